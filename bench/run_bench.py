@@ -0,0 +1,201 @@
+"""
+Benchmark offline pentru extragerea și normalizarea numerelor de telefon.
+
+Rulează funcțiile fierbinți din verificare_companii pe corpusul din bench/corpus,
+raportează debitul (MB/s, potriviri/s) și latența p50/p99 per funcție (inclusiv trie-ul de
+prefixe față de căutarea după țara rândului), apoi compară
+ce s-a extras cu bench/golden.json. O diferență față de golden => cod de ieșire 1.
+
+    python bench/run_bench.py                  # benchmark + verificare golden
+    python bench/run_bench.py -n 50 --json     # mai puține iterații, raport JSON
+    python bench/run_bench.py --update-golden  # după o schimbare intenționată a rezultatelor
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+GOLDEN_PATH = os.path.join(BENCH_DIR, "golden.json")
+
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+import verificare_companii as vc  # noqa: E402
+
+
+def incarca_corpus():
+    """Lista de cazuri (id, kind, country, html, text) din manifest.json."""
+    with open(os.path.join(CORPUS_DIR, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    cazuri = []
+    for nume, meta in manifest.items():
+        with open(os.path.join(CORPUS_DIR, nume), encoding="utf-8") as f:
+            continut = f.read()
+        if meta.get("per_line"):
+            # câte un caz pe linie: "țară<TAB>text"
+            for nr, linie in enumerate(continut.splitlines(), start=1):
+                if not linie.strip():
+                    continue
+                tara, _, text = linie.partition("\t")
+                cazuri.append((f"{nume}:{nr}", meta["kind"], tara or None, "", text))
+        elif nume.endswith(".html"):
+            cazuri.append((nume, meta["kind"], meta.get("country"), continut, vc.html_to_text(continut)))
+        else:
+            cazuri.append((nume, meta["kind"], meta.get("country"), "", continut))
+    return cazuri
+
+
+def _cifre_internationale(numar):
+    """Cifrele unui număr scris internațional (+ / 00), fără 00; None pentru numerele naționale."""
+    cifre = re.sub(r'\D', '', numar)
+    if numar.startswith("+"):
+        return cifre
+    return cifre[2:] if cifre.startswith("00") else None
+
+
+def _prefix_rand(cifre, tara):
+    """Căutarea de dinainte de trie: doar prefixul țării rândului."""
+    rule = vc.get_country_rule(tara)
+    return rule is not None and bool(rule.prefix) and cifre.startswith(rule.prefix)
+
+
+def rezultate(cazuri):
+    """Ce extrage fiecare funcție pe fiecare caz (comparat cu golden.json)."""
+    out = {}
+    for cid, _, tara, html, text in cazuri:
+        numere = vc.extrage_numere(text, country=tara)
+        out[cid] = {
+            "extrage_numere": numere,
+            "pagina": sorted(vc._numere_din_pagina(html, text, tara)),
+            "normalize_with_country_code": [vc.normalize_with_country_code(n, tara) for n in numere],
+            "is_valid_length": [vc.is_valid_length(n, tara) for n in numere],
+            "potrivire_prefix": [getattr(vc.potrivire_prefix(c), "name", None) if c else None
+                                 for c in map(_cifre_internationale, numere)],
+        }
+    return out
+
+
+def _percentila(valori, p):
+    valori = sorted(valori)
+    return valori[min(len(valori) - 1, int(round(p / 100 * (len(valori) - 1))))]
+
+
+def masoara(nume, apeluri, iteratii):
+    """apeluri = [(fn, octeți de intrare)]; fn() întoarce numărul de potriviri."""
+    durate, octeti, potriviri = [], 0, 0
+    for _ in range(iteratii):
+        for fn, n in apeluri:
+            t0 = time.perf_counter()
+            m = fn()
+            durate.append(time.perf_counter() - t0)
+            octeti += n
+            potriviri += m
+    total = sum(durate) or 1e-9
+    return {
+        "function": nume,
+        "calls": len(durate),
+        "mb_per_s": round(octeti / total / 1_000_000, 3),
+        "matches_per_s": round(potriviri / total, 1),
+        "p50_us": round(_percentila(durate, 50) * 1e6, 1),
+        "p99_us": round(_percentila(durate, 99) * 1e6, 1),
+    }
+
+
+def benchmark(cazuri, iteratii):
+    extrase = [(tara, vc.extrage_numere(text, country=tara)) for _, _, tara, _, text in cazuri]
+    pagini = [c for c in cazuri if c[3]]
+    numere = [(n, tara) for tara, lista in extrase for n in lista]
+    # toate numerele, ca cifre fără 00: trie-ul trebuie să nu coste mai mult decât căutarea după țara rândului
+    cifre = [(c, tara) for n, tara in numere for c in [_cifre_internationale(n) or re.sub(r'\D', '', n)]]
+
+    def _octeti(s):
+        return len(s.encode("utf-8"))
+
+    return [
+        masoara("html_to_text",
+                [(lambda h=h: vc.html_to_text(h) and 0, _octeti(h))
+                 for _, _, _, h, _ in pagini], iteratii),
+        masoara("extrage_numere",
+                [(lambda t=t, c=c: len(vc.extrage_numere(t, country=c)), _octeti(t))
+                 for _, _, c, _, t in cazuri], iteratii),
+        masoara("_numere_din_pagina",
+                [(lambda h=h, t=t, c=c: len(vc._numere_din_pagina(h, t, c)), _octeti(h) + _octeti(t))
+                 for _, _, c, h, t in cazuri], iteratii),
+        masoara("normalize_with_country_code",
+                [(lambda n=n, c=c: 1 if vc.normalize_with_country_code(n, c) else 0, _octeti(n))
+                 for n, c in numere], iteratii),
+        masoara("is_valid_length",
+                [(lambda n=n, c=c: 1 if vc.is_valid_length(n, c) else 0, _octeti(n))
+                 for n, c in numere], iteratii),
+        masoara("potrivire_prefix",
+                [(lambda d=d: 1 if vc.potrivire_prefix(d) else 0, len(d))
+                 for d, _ in cifre], iteratii),
+        masoara("prefix_row_lookup",
+                [(lambda d=d, c=c: 1 if _prefix_rand(d, c) else 0, len(d))
+                 for d, c in cifre], iteratii),
+    ]
+
+
+def compara(actual, golden):
+    """Diferențele față de golden, ca listă de mesaje."""
+    diferente = []
+    for cid in sorted(set(actual) | set(golden)):
+        if cid not in golden:
+            diferente.append(f"{cid}: not in golden.json (run with --update-golden)")
+            continue
+        if cid not in actual:
+            diferente.append(f"{cid}: missing from the corpus")
+            continue
+        for fn, asteptat in golden[cid].items():
+            obtinut = actual[cid].get(fn)
+            if obtinut != asteptat:
+                diferente.append(f"{cid} [{fn}]: expected {asteptat}, got {obtinut}")
+    return diferente
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="repetitions of the corpus (default: 200)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--update-golden", action="store_true", help="rewrite golden.json from the current code")
+    args = parser.parse_args(argv)
+
+    cazuri = incarca_corpus()
+    actual = rezultate(cazuri)
+
+    if args.update_golden:
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump(actual, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write("\n")
+        print(f"golden.json updated ({len(actual)} cases)")
+        return 0
+
+    raport = benchmark(cazuri, max(1, args.iterations))
+    golden = {}
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH, encoding="utf-8") as f:
+            golden = json.load(f)
+    diferente = compara(actual, golden)
+
+    if args.json:
+        print(json.dumps({"cases": len(cazuri), "iterations": args.iterations,
+                          "results": raport, "golden_mismatches": diferente}, indent=2, ensure_ascii=False))
+    else:
+        print(f"{len(cazuri)} cases x {args.iterations} iterations")
+        print(f"{'function':<30}{'calls':>9}{'MB/s':>10}{'matches/s':>13}{'p50 µs':>10}{'p99 µs':>10}")
+        for r in raport:
+            print(f"{r['function']:<30}{r['calls']:>9}{r['mb_per_s']:>10}{r['matches_per_s']:>13}"
+                  f"{r['p50_us']:>10}{r['p99_us']:>10}")
+        if diferente:
+            print(f"\nGOLDEN MISMATCH ({len(diferente)}):")
+            for d in diferente:
+                print("  " + d)
+        else:
+            print("\ngolden: OK")
+    return 1 if diferente else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,141 @@
+import time
+T_PORNIRE = time.perf_counter()   # momentul lansării, pentru "time to first query"
+import csv
 import json
+import logging
 import os
+import asyncio
+import contextvars
 from datetime import datetime
-import tkinter as tk
-from tkinter import filedialog, scrolledtext, messagebox
-import pandas as pd
 import re
-import time
+import sys
+import argparse
+import signal
+import subprocess
+import shutil
+import heapq
+import random
+import unicodedata
+import queue
+import sqlite3
 import threading
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from html.parser import HTMLParser
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from bisect import bisect_right
+from functools import lru_cache
+from types import MappingProxyType
+from typing import NamedTuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+try:
+    import psutil   # opțional: memoria browserelor și procesele orfane
+except ImportError:
+    psutil = None
+# pandas, openpyxl, urllib3, selenium și undetected_chromedriver sunt importate abia când e nevoie
+# de ele (fereastra apare imediat); selenium/uc la pornirea primului browser, vezi incarca_selenium().
+class _SeleniumNeincarcat(Exception):
+    """Înlocuitor pentru excepțiile selenium până la primul browser (nu se potrivește cu nimic)."""
+
+uc = By = WebDriverWait = EC = None
+TimeoutException = WebDriverException = _SeleniumNeincarcat
+_selenium_lock = threading.Lock()
+
+def incarca_selenium():
+    """Importă selenium și undetected_chromedriver (o singură dată) și le publică la nivel de modul."""
+    global uc, By, WebDriverWait, EC, TimeoutException, WebDriverException
+    with _selenium_lock:
+        if uc is not None:
+            return
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        import undetected_chromedriver as _uc
+        uc = _uc   # ultimul: uc != None înseamnă că toate numele de mai sus sunt gata
 
 # === Load country phone codes safely ===
+# din directorul curent (ca până acum) sau, pentru cron/CLI, de lângă script
+COUNTRY_RULES_PATH = next((p for p in ("all_country_phone_rules.json",
+                                       os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                    "all_country_phone_rules.json"))
+                           if os.path.exists(p)), "all_country_phone_rules.json")
 try:
-    with open("all_country_phone_rules.json", "r", encoding="utf-8") as f:
+    with open(COUNTRY_RULES_PATH, "r", encoding="utf-8") as f:
         country_rules  = json.load(f)
 except Exception as e:
     country_rules  = {}
     # vom afișa eroarea în UI la start
 
+class CountryRule(NamedTuple):
+    """Regulile unei țări, precompilate din all_country_phone_rules.json."""
+    name: str
+    prefix: str             # doar cifrele prefixului ("+1-268" -> "1268")
+    min_length: int
+    max_length: int
+    keep_trunk_prefix: bool  # 0-ul din față face parte din număr (Italia) și nu se taie
+
+    def fits(self, n: int) -> bool:
+        return self.min_length <= n <= self.max_length
+
+def _norm_country(name) -> str:
+    """'  Österreich ' -> 'osterreich', 'U.S.A.' -> 'u s a' (fără diacritice, lowercase)."""
+    s = unicodedata.normalize("NFKD", str(name or ""))
+    s = "".join(c for c in s if not unicodedata.combining(c)).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", s).split())
+
+def _build_country_index(rules):
+    index = {}
+    for name, r in rules.items():
+        rule = CountryRule(
+            name=name,
+            prefix=re.sub(r'\D', '', r.get("code", "")),
+            min_length=int(r.get("min_length", 7)),
+            max_length=int(r.get("max_length", 15)),
+            keep_trunk_prefix=bool(r.get("keep_trunk_prefix", False)),
+        )
+        # numele oficial are prioritate față de aliasurile altor țări
+        index[_norm_country(name)] = rule
+    for name, r in rules.items():
+        for alias in r.get("aliases", []):
+            index.setdefault(_norm_country(alias), index[_norm_country(name)])
+    return MappingProxyType(index)
+
+COUNTRY_INDEX = _build_country_index(country_rules)
+
+def _build_prefix_trie(rules, index):
+    """Trie pe cifrele prefixelor: {cifră: nod}; nod[None] = regula țării care se termină acolo."""
+    trie = {}
+    for name in rules:
+        rule = index[_norm_country(name)]
+        if not rule.prefix:
+            continue
+        nod = trie
+        for c in rule.prefix:
+            nod = nod.setdefault(c, {})
+        nod.setdefault(None, rule)   # prefix comun (+1, +7): rămâne prima țară din fișier
+    return trie
+
+PREFIX_TRIE = _build_prefix_trie(country_rules, COUNTRY_INDEX)
+
+def potrivire_prefix(digits):
+    """Regula țării cu cel mai lung prefix de la începutul lui digits (o singură trecere), sau None."""
+    nod, gasit = PREFIX_TRIE, None
+    for c in digits:
+        nod = nod.get(c)
+        if nod is None:
+            break
+        gasit = nod.get(None, gasit)
+    return gasit
+
+@lru_cache(maxsize=1024)
+def get_country_rule(country):
+    """CountryRule pentru numele/aliasul/codul ISO al țării, sau None dacă e necunoscută."""
+    if not country:
+        return None
+    return COUNTRY_INDEX.get(_norm_country(country))
+
 """Configuration and helper functions for verificare_companii.py"""
 # Domenii care trebuie ignorate
 EXCLUDED_DOMAINS = ["wikipedia.org", "yelp.com", "linkedin.com", "youtube.com", "wa.me", "whatsapp.com"]
@@ -105,54 +219,817 @@ SUSPECT_PATTERN_RE = re.compile(
 
 ZIP_CODE_RE = re.compile(r"^\d{4}-\d{3}$|^\d{5}-\d{4}$")
 
+# === Mod de rulare ===
+GUI_ACTIV = False        # True doar în interfata(): dialoguri Tk (erori, Save As…) permise
+CHROME_HEADLESS = False  # rulări batch (CLI): Chrome fără fereastră
+
+# === Paralelism ===
+DRIVER_POOL_SIZE = 3                  # câte browsere Chrome lucrează în paralel
+CHROME_PROFILES_DIR = "chrome_profiles"  # fiecare browser are propriul user-data-dir aici
+# chromedriver-ul patch-uit de undetected_chromedriver, refolosit între rulări (None = patch la fiecare pornire)
+CHROMEDRIVER_CACHE = os.path.join(CHROME_PROFILES_DIR, "chromedriver" + (".exe" if os.name == "nt" else ""))
+
+"""=== Jurnal: workerii pun evenimente într-o coadă, GUI-ul le afișează în loturi ==="""
+
+LOG_FILE_PATH = "verificare_companii.log"
+LOG_FILE_MAX_BYTES = 5_000_000     # rotire după ~5 MB
+LOG_FILE_BACKUPS = 3
+LOG_DRAIN_MS = 100                 # cât de des golește GUI-ul coada
+LOG_DRAIN_MAX = 500                # evenimente afișate cel mult per tur (GUI-ul rămâne responsiv)
+
+class LogEvent(NamedTuple):
+    ts: float
+    level: int
+    msg: str
+    thread: str
+    fields: dict
+
+def _nivel(msg):
+    if "❌" in msg:
+        return logging.ERROR
+    if "⚠️" in msg:
+        return logging.WARNING
+    return logging.INFO
+
+class LogSink:
+    """
+    Destinația mesajelor din workeri: emit() doar pune evenimentul în coadă (nu blochează
+    niciodată pe Tk). GUI-ul ia evenimentele cu drain(), iar un QueueListener le scrie
+    în paralel în fișierul rotativ.
+    """
+
+    def __init__(self, path=LOG_FILE_PATH, max_bytes=LOG_FILE_MAX_BYTES, backups=LOG_FILE_BACKUPS,
+                 keep_events=True):
+        self._events = queue.SimpleQueue() if keep_events else None
+        self._logger = logging.getLogger(f"verificare_companii.{id(self)}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._listener = None
+        if path:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(threadName)s] %(message)s"))
+            fisier_q = queue.SimpleQueue()
+            self._logger.addHandler(QueueHandler(fisier_q))
+            self._listener = QueueListener(fisier_q, handler)
+            self._listener.start()
+
+    def emit(self, msg, level=None, **fields):
+        level = _nivel(msg) if level is None else level
+        if self._events is not None:
+            self._events.put(LogEvent(time.time(), level, msg, threading.current_thread().name, fields))
+        self._logger.log(level, msg.strip("\n"), extra={"fields": fields})
+
+    def drain(self, max_events=LOG_DRAIN_MAX):
+        """Evenimentele adunate de la ultimul apel (cel mult max_events)."""
+        events = []
+        if self._events is None:
+            return events
+        try:
+            while len(events) < max_events:
+                events.append(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def in_gui(self, fn):
+        """
+        Rulează fn() pe thread-ul GUI-ului (care golește coada) și întoarce rezultatul.
+        Din thread-ul principal sau fără coadă (CLI) fn() rulează direct.
+        """
+        if self._events is None or threading.current_thread() is threading.main_thread():
+            return fn()
+        fut = Future()
+        self._events.put(LogEvent(time.time(), logging.DEBUG, "", threading.current_thread().name,
+                                  {"cerere": (fn, fut)}))
+        return fut.result()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+def log(consola, msg, level=None, **fields):
+    """
+    Trimite un mesaj în jurnal. consola e un LogSink (workeri, orice thread) sau
+    None (mesajul se ignoră).
+    """
+    if consola is None:
+        return
+    consola.emit(msg, level=level, **fields)
+
+"""=== Metrici per rând și per etapă ==="""
+
+METRICS_ENABLED = True
+METRICS_PATH = "metrics_rows.jsonl"     # câte o linie per rând; .csv => CSV
+METRICS_PROM_PATH = "metrics.prom"      # instantaneu în formatul text Prometheus, rescris periodic
+METRICS_PROM_EVERY = 25                 # rânduri între două rescrieri ale instantaneului
+
+# coloanele fixe din CSV (JSONL păstrează și etapele neprevăzute)
+METRIC_STAGES = ["serp", "maps", "website", "facebook", "slot_wait", "google_wait", "serp_load", "consent",
+                 "panel", "maps_load", "maps_place", "page_http", "page_browser", "contact"]
+METRIC_COUNTERS = ["retries", "driver_restarts", "driver_recycles", "captchas", "page_bytes", "pages_http", "pages_browser",
+                   "contact_pages"]
+
+class RowMetrics:
+    """Duratele (secunde) și contoarele unui rând; completate de cronometru() și numara()."""
+
+    def __init__(self, idx=None):
+        self.idx = idx
+        self.durate = {}
+        self.contoare = {}
+
+    def adauga(self, etapa, secunde):
+        self.durate[etapa] = self.durate.get(etapa, 0.0) + secunde
+
+    def numara(self, contor, n=1):
+        self.contoare[contor] = self.contoare.get(contor, 0) + n
+
+# metricile rândului procesat de thread-ul curent (setat de pipeline pentru fiecare etapă)
+metrics_curente = contextvars.ContextVar("metrics_curente", default=None)
+
+@contextmanager
+def cronometru(etapa):
+    """Adaugă durata blocului la etapa dată în metricile rândului curent (dacă există)."""
+    rm = metrics_curente.get()
+    if rm is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        rm.adauga(etapa, time.perf_counter() - start)
+
+def numara(contor, n=1):
+    rm = metrics_curente.get()
+    if rm is not None:
+        rm.numara(contor, n)
+
+timp_prima_cautare = None   # secunde de la lansarea programului până la prima căutare Google
+_prima_cautare_lock = threading.Lock()
+
+def marcheaza_prima_cautare(consola=None):
+    """Notează (o singură dată per proces) timpul de la lansare până la prima căutare."""
+    global timp_prima_cautare
+    with _prima_cautare_lock:
+        if timp_prima_cautare is not None:
+            return
+        timp_prima_cautare = time.perf_counter() - T_PORNIRE
+    log(consola, f"⏱️ Time to first query: {timp_prima_cautare:.2f}s", time_to_first_query=round(timp_prima_cautare, 3))
+
+def _percentile(valori, p):
+    valori = sorted(valori)
+    return valori[min(len(valori) - 1, int(round(p / 100 * (len(valori) - 1))))] if valori else 0.0
+
+class RunMetrics:
+    """
+    Metricile unei rulări: fiecare rând terminat e scris imediat în METRICS_PATH (JSONL/CSV),
+    iar agregatele ajung periodic în instantaneul Prometheus și, la final, în sumar.
+    """
+
+    def __init__(self, path=METRICS_PATH, prom_path=METRICS_PROM_PATH):
+        self.path = path
+        self.prom_path = prom_path
+        self._lock = threading.Lock()
+        self._durate = {}     # etapă -> [secunde per rând]
+        self._contoare = {}
+        self.randuri = 0
+        self._f = None
+        self._csv = None
+        if path:
+            self._f = open(path, "w", encoding="utf-8", newline="")
+            if path.lower().endswith(".csv"):
+                self._csv = csv.writer(self._f)
+                self._csv.writerow(["row", "total_s"] + [f"{e}_s" for e in METRIC_STAGES] + METRIC_COUNTERS)
+
+    def scrie(self, rm):
+        """Înregistrează un rând terminat."""
+        total = sum(rm.durate.get(e, 0.0) for e in ETAPE_NUME)
+        with self._lock:
+            self.randuri += 1
+            for etapa, sec in rm.durate.items():
+                self._durate.setdefault(etapa, []).append(sec)
+            self._durate.setdefault("row_total", []).append(total)
+            for contor, n in rm.contoare.items():
+                self._contoare[contor] = self._contoare.get(contor, 0) + n
+            if self._csv is not None:
+                self._csv.writerow([rm.idx, round(total, 4)] +
+                                   [round(rm.durate.get(e, 0.0), 4) for e in METRIC_STAGES] +
+                                   [rm.contoare.get(c, 0) for c in METRIC_COUNTERS])
+            elif self._f is not None:
+                self._f.write(json.dumps({"row": rm.idx, "total_s": round(total, 4),
+                                          "stages": {k: round(v, 4) for k, v in rm.durate.items()},
+                                          "counters": rm.contoare}) + "\n")
+            if self._f is not None:
+                self._f.flush()
+            scrie_prom = self.prom_path and self.randuri % METRICS_PROM_EVERY == 0
+        if scrie_prom:
+            self.scrie_prometheus()
+
+    def summary(self):
+        """{etapă: {n, p50, p90, p99, sum}} plus contoarele totale."""
+        with self._lock:
+            etape = {e: {"n": len(v), "p50": round(_percentile(v, 50), 3), "p90": round(_percentile(v, 90), 3),
+                         "p99": round(_percentile(v, 99), 3), "sum": round(sum(v), 3)}
+                     for e, v in self._durate.items()}
+            rez = {"rows": self.randuri, "stages": etape, "counters": dict(self._contoare)}
+        if timp_prima_cautare is not None:
+            rez["time_to_first_query_s"] = round(timp_prima_cautare, 3)
+        return rez
+
+    def prometheus_text(self):
+        rez = self.summary()
+        linii = ["# HELP verificare_companii_rows_total Rows finished in this run.",
+                 "# TYPE verificare_companii_rows_total counter",
+                 f"verificare_companii_rows_total {rez['rows']}",
+                 "# HELP verificare_companii_stage_seconds Time spent per row in each stage.",
+                 "# TYPE verificare_companii_stage_seconds summary"]
+        for etapa, st in sorted(rez["stages"].items()):
+            for q, cheie in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99")):
+                linii.append(f'verificare_companii_stage_seconds{{stage="{etapa}",quantile="{q}"}} {st[cheie]}')
+            linii.append(f'verificare_companii_stage_seconds_sum{{stage="{etapa}"}} {st["sum"]}')
+            linii.append(f'verificare_companii_stage_seconds_count{{stage="{etapa}"}} {st["n"]}')
+        if "time_to_first_query_s" in rez:
+            linii += ["# HELP verificare_companii_time_to_first_query_seconds From program launch to the first Google query.",
+                      "# TYPE verificare_companii_time_to_first_query_seconds gauge",
+                      f"verificare_companii_time_to_first_query_seconds {rez['time_to_first_query_s']}"]
+        for contor, n in sorted(rez["counters"].items()):
+            linii.append(f"# TYPE verificare_companii_{contor}_total counter")
+            linii.append(f"verificare_companii_{contor}_total {n}")
+        return "\n".join(linii) + "\n"
+
+    def scrie_prometheus(self):
+        if not self.prom_path:
+            return
+        tmp = self.prom_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, self.prom_path)   # node_exporter nu vede niciodată un fișier pe jumătate
+
+    def log_summary(self, consola=None):
+        rez = self.summary()
+        if not rez["rows"]:
+            return
+        log(consola, f"📊 Row timings ({rez['rows']} rows), seconds p50 / p90 / p99:")
+        for etapa, st in sorted(rez["stages"].items(), key=lambda kv: -kv[1]["sum"]):
+            log(consola, f"   {etapa:<14} {st['p50']:>7} / {st['p90']:>7} / {st['p99']:>7}  (total {st['sum']}s, n={st['n']})")
+        if "time_to_first_query_s" in rez:
+            log(consola, f"   time to first query: {rez['time_to_first_query_s']}s")
+        if rez["counters"]:
+            log(consola, "   " + ", ".join(f"{k}={v}" for k, v in sorted(rez["counters"].items())))
+
+    def close(self):
+        self.scrie_prometheus()
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
 """=== Selenium / undetected-chromedriver helpers ==="""
 
-# === Lazy Chrome driver (prevents crash at import) ===
-driver = None  # will be created on-demand
+def _optiuni_chrome():
+    options = uc.ChromeOptions()
+    options.page_load_strategy = "none"   # "none" dacă vrei și mai agresiv + wait-uri proprii
+    options.add_argument("--lang=en")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-first-run")
+    options.add_argument("--start-maximized")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-features=Translate,BackForwardCache,AcceptCHFrame,HeavyAdIntervention")
+    if CHROME_HEADLESS:
+        options.add_argument("--headless=new")
+    if BLOCK_RESOURCES_ENABLED and BLOCK_STATS_ENABLED:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+_chromedriver_lock = threading.Lock()
+
+def _salveaza_chromedriver(driver):
+    """Copiază chromedriver-ul abia patch-uit în CHROMEDRIVER_CACHE (o singură dată)."""
+    if not CHROMEDRIVER_CACHE:
+        return
+    with _chromedriver_lock:
+        if os.path.exists(CHROMEDRIVER_CACHE):
+            return
+        # procesele shard împart cache-ul: fiecare copiază în fișierul lui, apoi replace atomic
+        tmp = f"{CHROMEDRIVER_CACHE}.{os.getpid()}.tmp"
+        try:
+            sursa = driver.patcher.executable_path
+            os.makedirs(os.path.dirname(os.path.abspath(CHROMEDRIVER_CACHE)), exist_ok=True)
+            shutil.copy2(sursa, tmp)
+            os.replace(tmp, CHROMEDRIVER_CACHE)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
 
-def ensure_driver(consola=None):
-    global driver
-    if driver is not None:
-        return driver
+def _porneste_chrome(profile_dir=None, consola=None):
+    """Pornește o instanță uc.Chrome; profile_dir = user-data-dir propriu (None = profil temporar)."""
     try:
-        options = uc.ChromeOptions()
-        options.page_load_strategy = "none"   # "none" dacă vrei și mai agresiv + wait-uri proprii
-        options.add_argument("--lang=en")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-first-run")
-        options.add_argument("--start-maximized")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-background-networking")
-        options.add_argument("--disable-renderer-backgrounding")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-features=Translate,BackForwardCache,AcceptCHFrame,HeavyAdIntervention")
-        #options.add_argument("--headless")
-        
-        driver = uc.Chrome(options=options, use_subprocess=True)
+        incarca_selenium()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        user_data_dir = os.path.abspath(profile_dir) if profile_dir else None
+
+        # chromedriver-ul deja patch-uit din cache: fără descărcare și fără patch la pornire
+        exe = os.path.abspath(CHROMEDRIVER_CACHE) if CHROMEDRIVER_CACHE and os.path.exists(CHROMEDRIVER_CACHE) else None
+        try:
+            driver = uc.Chrome(options=_optiuni_chrome(), use_subprocess=True,
+                               user_data_dir=user_data_dir, driver_executable_path=exe)
+        except Exception:
+            if exe is None:
+                raise
+            # de obicei Chrome s-a actualizat și driverul din cache nu mai e compatibil
+            with _chromedriver_lock:
+                try:
+                    os.remove(CHROMEDRIVER_CACHE)
+                except OSError:
+                    pass
+            exe = None
+            driver = uc.Chrome(options=_optiuni_chrome(), use_subprocess=True, user_data_dir=user_data_dir)
+        if exe is None:
+            _salveaza_chromedriver(driver)
         driver.set_page_load_timeout(4)   # timeout pentru driver.get()
         driver.implicitly_wait(0)         # fără așteptare implicită
         driver.set_script_timeout(8)
         return driver
-        
+
     except Exception as e:
         msg = f"The browser can not be opened: {e}"
-        if consola:
-            consola.insert(tk.END, "❌ " + msg + "\n")
-            consola.see(tk.END)
-            consola.update()
-        messagebox.showerror("Chrome error", msg)
+        log(consola, "❌ " + msg, dialog="error", title="Chrome error", dialog_text=msg)
+        return None
+
+"""=== Ciclul de viață al browserelor: reciclare, browser de rezervă, procese orfane ==="""
+
+DRIVER_RECYCLE_NAVIGATIONS = 300   # browserul e înlocuit după atâtea navigări...
+DRIVER_RECYCLE_RSS_MB = 1500       # ...sau când Chrome (cu toate procesele lui) trece de atâta memorie
+DRIVER_RSS_CHECK_EVERY = 20        # memoria se verifică doar la fiecare a N-a navigare (psutil)
+DRIVER_STANDBY = True              # un browser de rezervă pornit din timp, ca schimbul să fie instant
+DRIVER_STANDBY_AHEAD = 0.8         # rezerva pornește la 80% din prag
+
+def numara_navigare(driver):
+    if driver is not None:
+        driver._navigari = getattr(driver, "_navigari", 0) + 1
+
+def _rss_chrome_mb(driver):
+    """Memoria (RSS, MB) a procesului Chrome și a copiilor lui; None fără psutil."""
+    if psutil is None:
+        return None
+    pid = getattr(driver, "browser_pid", None)
+    if not pid:
+        return None
+    try:
+        proc = psutil.Process(pid)
+        procese = [proc] + proc.children(recursive=True)
+    except psutil.Error:
         return None
+    total = 0
+    for p in procese:
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / 1_000_000
+
+def uzura_driver(driver):
+    """Cât de aproape e browserul de reciclare (1.0 = trebuie înlocuit)."""
+    if driver is None:
+        return 0.0
+    navigari = getattr(driver, "_navigari", 0)
+    uzura = navigari / DRIVER_RECYCLE_NAVIGATIONS if DRIVER_RECYCLE_NAVIGATIONS else 0.0
+    if DRIVER_RECYCLE_RSS_MB and navigari and navigari % DRIVER_RSS_CHECK_EVERY == 0:
+        driver._rss_mb = _rss_chrome_mb(driver)
+    rss = getattr(driver, "_rss_mb", None)
+    if rss and DRIVER_RECYCLE_RSS_MB:
+        uzura = max(uzura, rss / DRIVER_RECYCLE_RSS_MB)
+    return uzura
+
+def curata_procese_orfane(profiles_dir=CHROME_PROFILES_DIR, consola=None):
+    """
+    Oprește chromedriver-ele și Chrome-urile noastre rămase orfane după un crash: Chrome cu
+    user-data-dir în profiles_dir, chromedriver din CHROMEDRIVER_CACHE sau cu un astfel de
+    Chrome copil. Procesele altor programe/utilizatori nu se ating. Fără psutil nu face nimic.
+    """
+    if psutil is None:
+        return 0
+    profiles = os.path.abspath(profiles_dir)
+    driver_cache = os.path.abspath(CHROMEDRIVER_CACHE) if CHROMEDRIVER_CACHE else None
+
+    oprite = 0
+    for p in psutil.process_iter(["pid", "name", "ppid", "cmdline", "exe"]):
+        try:
+            name = (p.info["name"] or "").lower()
+            cmdline = " ".join(p.info["cmdline"] or [])
+            orfan = p.info["ppid"] in (0, 1) or not psutil.pid_exists(p.info["ppid"])
+            if not orfan:
+                continue
+            if "chromedriver" in name:
+                exe = p.info["exe"]
+                nostru = (driver_cache is not None and exe and os.path.abspath(exe) == driver_cache) or any(
+                    profiles in " ".join(c.cmdline()) for c in p.children(recursive=True))
+            else:
+                nostru = "chrome" in name and profiles in cmdline
+            if nostru:
+                p.kill()
+                oprite += 1
+        except psutil.Error:
+            continue
+    if oprite:
+        log(consola, f"🧹 Stopped {oprite} orphaned Chrome/chromedriver processes.")
+    return oprite
+
+class DriverSlot:
+    """Un browser Chrome cu profilul lui, folosit de un singur worker la un moment dat."""
+
+    def __init__(self, slot_id, profile_dir=None, pool=None):
+        self.slot_id = slot_id
+        self.profile_dir = profile_dir
+        self.pool = pool
+        self.driver = None
+        self._lock = threading.Lock()   # încălzirea din fundal și workerul nu pornesc două browsere
+
+    def get(self, consola=None):
+        with self._lock:
+            if self.driver is None:
+                self.driver = _porneste_chrome(self.profile_dir, consola=consola)
+            return self.driver
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+
+    def restart(self, consola=None):
+        numara("driver_restarts")
+        if self.pool is not None:
+            return self.pool.recicleaza(self, consola=consola)
+        self.quit()
+        return self.get(consola=consola)
+
+class DriverPool:
+    """Pool de browsere: fiecare worker ia un slot liber, îl folosește pentru un rând și îl eliberează."""
+
+    def __init__(self, size=DRIVER_POOL_SIZE, profiles_dir=CHROME_PROFILES_DIR):
+        self.size = max(1, int(size))
+        self.slots = [DriverSlot(i, os.path.join(profiles_dir, f"profile_{i}"), pool=self)
+                      for i in range(self.size)]
+        self._free = queue.Queue()
+        for slot in self.slots:
+            self._free.put(slot)
+        # rezerva are propriul profil; la schimb, profilul browserului vechi devine al următoarei
+        # rezerve abia după ce browserul vechi s-a închis (None până atunci)
+        self._profil_rezerva = os.path.join(profiles_dir, "profile_standby")
+        self._rezerva = None          # Future -> driver
+        self._rezerva_lock = threading.Lock()
+        self._inchis = False
+        curata_procese_orfane(profiles_dir)
+
+    def incalzeste(self, consola=None):
+        """Pornește browserele în fundal (de ex. cât timp utilizatorul alege fișierul)."""
+        for slot in self.slots:
+            threading.Thread(target=slot.get, kwargs={"consola": consola},
+                             name=f"chrome-warmup-{slot.slot_id}", daemon=True).start()
+
+    def acquire(self):
+        with cronometru("slot_wait"):
+            return self._free.get()
+
+    def release(self, slot):
+        # reciclarea se face între rânduri, niciodată în mijlocul unuia
+        uzura = uzura_driver(slot.driver)
+        if uzura >= 1.0:
+            self.recicleaza(slot)
+        elif uzura >= DRIVER_STANDBY_AHEAD:
+            self._porneste_rezerva()
+        self._free.put(slot)
+
+    def _porneste_rezerva(self):
+        if not DRIVER_STANDBY:
+            return
+        with self._rezerva_lock:
+            if self._rezerva is not None or self._inchis or self._profil_rezerva is None:
+                return
+            fut = self._rezerva = Future()
+            profil = self._profil_rezerva
+
+        def porneste():
+            try:
+                fut.set_result(_porneste_chrome(profil))
+            except Exception as e:
+                fut.set_exception(e)
+        threading.Thread(target=porneste, name="chrome-standby", daemon=True).start()
+
+    def recicleaza(self, slot, consola=None):
+        """Înlocuiește browserul slotului cu rezerva (sau cu unul nou, dacă nu există rezervă)."""
+        with self._rezerva_lock:
+            fut, self._rezerva = self._rezerva, None
+        driver = None
+        if fut is not None:
+            try:
+                driver = fut.result()
+            except Exception:
+                driver = None
+        if driver is None:
+            slot.quit()
+            driver = slot.get(consola=consola)
+            self._porneste_rezerva()
+            return driver
+
+        vechi = slot.driver
+        with self._rezerva_lock:
+            slot.driver = driver
+            slot.profile_dir, profil_vechi = self._profil_rezerva, slot.profile_dir
+            self._profil_rezerva = None
+        numara("driver_recycles")
+        log(consola, f"♻️ Browser {slot.slot_id} replaced by the standby browser.")
+
+        def inchide_vechiul():
+            # profilul vechi devine liber abia după quit(), apoi pornește următoarea rezervă
+            if vechi is not None:
+                try:
+                    vechi.quit()
+                except Exception:
+                    pass
+            with self._rezerva_lock:
+                self._profil_rezerva = profil_vechi
+            self._porneste_rezerva()
+        threading.Thread(target=inchide_vechiul, name="chrome-recycle", daemon=True).start()
+        return driver
+
+    @contextmanager
+    def slot(self):
+        slot = self.acquire()
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+    def close(self):
+        with self._rezerva_lock:
+            self._inchis = True
+            fut, self._rezerva = self._rezerva, None
+        for slot in self.slots:
+            slot.quit()
+        if fut is not None:
+            try:
+                driver = fut.result(timeout=30)
+                if driver is not None:
+                    driver.quit()
+            except Exception:
+                pass
+
+"""=== Blocarea resurselor inutile prin CDP (imagini, fonturi, media, trackere) ==="""
+
+BLOCK_RESOURCES_ENABLED = True
+BLOCK_STATS_ENABLED = False     # opt-in (--block-stats): performance log-ul costă trafic pe conexiunea chromedriver
+
+# pattern-uri pentru Network.setBlockedURLs ('*' = wildcard), pe categorii
+BLOCK_PATTERNS = {
+    "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.ico*", "*.bmp*",
+               "*.svg*", "*://*.gstatic.com/images*", "*://*.googleusercontent.com/*"],
+    "fonts": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*", "*://fonts.googleapis.com/*",
+              "*://fonts.gstatic.com/*", "*://use.typekit.net/*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*", "*.wav*", "*.mov*",
+              "*://*.youtube.com/embed/*", "*://player.vimeo.com/*"],
+    "trackers": ["*://*.google-analytics.com/*", "*://*.googletagmanager.com/*", "*://*.doubleclick.net/*",
+                 "*://*.googlesyndication.com/*", "*://*.googleadservices.com/*", "*://connect.facebook.net/*",
+                 "*://*.hotjar.com/*", "*://*.clarity.ms/*", "*://*.criteo.com/*", "*://*.taboola.com/*",
+                 "*://*.outbrain.com/*", "*://bat.bing.com/*", "*://*.tiktok.com/i18n/pixel*",
+                 "*://*.cookiebot.com/*", "*://*.onetrust.com/*", "*://*.cookielaw.org/*"],
+    "styles": ["*.css*"],
+}
+
+# ce blocăm pe fiecare tip de pagină; SERP-ul și Maps au nevoie de scripturile și CSS-ul Google
+BLOCK_PROFILES = {
+    "serp": ["images", "fonts", "media", "trackers"],
+    "maps": ["fonts", "media", "trackers"],
+    "website": ["images", "fonts", "media", "trackers"],   # fără CSS: display:none schimbă innerText
+    "facebook": ["fonts", "media", "trackers"],   # pagina e randată din JS servit tot de pe fbcdn.net
+}
+
+# dimensiunea medie estimată a unei resurse blocate, pe tipul raportat de Chrome
+BLOCK_EST_BYTES = {"Image": 60_000, "Font": 35_000, "Media": 400_000, "Script": 45_000,
+                   "Stylesheet": 25_000, "XHR": 5_000, "Fetch": 5_000}
+BLOCK_EST_BYTES_DEFAULT = 10_000
+
+class BlockStats:
+    """Cereri blocate și octeți estimați economisiți în rularea curentă, pe tip de resursă."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.bytes = {}
+
+    def record(self, tip_resursa):
+        with self._lock:
+            self.requests[tip_resursa] = self.requests.get(tip_resursa, 0) + 1
+            self.bytes[tip_resursa] = (self.bytes.get(tip_resursa, 0) +
+                                       BLOCK_EST_BYTES.get(tip_resursa, BLOCK_EST_BYTES_DEFAULT))
+
+    def total(self):
+        with self._lock:
+            return sum(self.requests.values()), sum(self.bytes.values())
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.bytes.clear()
+
+block_stats = BlockStats()
+
+def colecteaza_blocate(driver):
+    """Numără cererile blocate din performance log-ul driverului (golește log-ul)."""
+    if not BLOCK_STATS_ENABLED:
+        return
+    try:
+        intrari = driver.get_log("performance")
+    except Exception:
+        return
+    for intrare in intrari:
+        try:
+            msg = json.loads(intrare["message"])["message"]
+        except (KeyError, ValueError, TypeError):
+            continue
+        if msg.get("method") == "Network.loadingFailed":
+            params = msg.get("params") or {}
+            if params.get("blockedReason") == "inspector":   # blocat de setBlockedURLs
+                block_stats.record(params.get("type") or "Other")
+
+def aplica_profil_blocare(driver, tip):
+    """Setează lista de URL-uri blocate pentru tipul de pagină (doar dacă s-a schimbat)."""
+    if not BLOCK_RESOURCES_ENABLED or driver is None:
+        return
+    colecteaza_blocate(driver)
+    profil = BLOCK_PROFILES.get(tip, [])
+    if getattr(driver, "_profil_blocare", None) == profil:
+        return
+    urls = [u for categorie in profil for u in BLOCK_PATTERNS.get(categorie, [])]
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+        driver._profil_blocare = profil
+    except Exception:
+        pass
 
-def safe_get(driver, url, attempts=2, load_stop_after=3):
+# === Lazy Chrome driver (prevents crash at import) ===
+_default_slot = None  # browserul implicit, creat la cerere
+
+def ensure_driver(consola=None):
+    """Browserul implicit (un singur Chrome) pentru apelurile fără pool."""
+    global _default_slot
+    if _default_slot is None:
+        _default_slot = DriverSlot(0)
+    return _default_slot.get(consola=consola)
+
+"""=== Așteptări pe condiții (în loc de sleep-uri fixe) ==="""
+
+# Timpul maxim (secunde) pe tip de pagină; de obicei condițiile sunt îndeplinite mult mai repede.
+READY_BUDGETS = {
+    "serp": 4.0,       # rezultatele Google (panoul din dreapta sau lista de rezultate)
+    "consent": 1.0,    # dialogul de cookies Google
+    "maps": 4.0,       # profilul Google Maps (DOM)
+    "maps_place": 6.0, # ... până apare locul (URL /maps/place sau og:title)
+    "panel": 3.0,      # panoul din dreapta, după ce SERP-ul e gata
+    "website": 3.0,    # site-ul firmei, deschis în browser
+    "facebook": 4.0,   # pagina de Facebook
+    "scroll": 1.5,     # conținut lazy încărcat după scroll
+}
+READY_POLL = 0.1               # cât de des verificăm condițiile
+NETWORK_IDLE_MS = 500          # fără resurse noi de atâta timp => rețeaua e liniștită
+TEXT_STABLE_MS = 400           # textul din body nu s-a mai schimbat de atâta timp
+
+# ce trebuie să apară pe SERP ca să putem citi pagina (inclusiv captcha / consimțământ)
+SERP_READY_CSS = ("#rhs, div[role='complementary'], div[data-attrid='title'], #search, #botstuff, "
+                  "#captcha-form, form[action*='consent'], iframe[src*='consent'], #L2AGLb")
+
+def dom_ready(d) -> bool:
+    try:
+        return d.execute_script("return document.readyState") in ("interactive", "complete")
+    except Exception:
+        return False
+
+def selector_prezent(css):
+    """Condiție: cel puțin un element care se potrivește cu selectorul CSS."""
+    def cond(d):
+        try:
+            return bool(d.find_elements(By.CSS_SELECTOR, css))
+        except Exception:
+            return False
+    return cond
+
+def retea_linistita(idle_ms=NETWORK_IDLE_MS):
+    """Condiție: documentul e încărcat și nicio resursă nu s-a terminat în ultimele idle_ms."""
+    def cond(d):
+        try:
+            return bool(d.execute_script("""
+                if (document.readyState !== 'complete') return false;
+                var last = 0, e = performance.getEntriesByType('resource');
+                for (var i = 0; i < e.length; i++) last = Math.max(last, e[i].responseEnd || e[i].startTime);
+                return performance.now() - last >= arguments[0];
+            """, idle_ms))
+        except Exception:
+            return False
+    return cond
+
+def text_stabil(stable_ms=TEXT_STABLE_MS):
+    """Condiție: lungimea textului din body nu s-a schimbat de stable_ms (cu stare, una per așteptare)."""
+    stare = {"len": -1, "since": 0.0}
+    def cond(d):
+        try:
+            n = d.execute_script("return document.body ? document.body.innerText.length : -1")
+        except Exception:
+            return False
+        acum = time.monotonic()
+        if n != stare["len"]:
+            stare["len"], stare["since"] = n, acum
+            return False
+        return n >= 0 and (acum - stare["since"]) * 1000 >= stable_ms
+    return cond
+
+class ReadinessStats:
+    """Cât s-a așteptat efectiv pe fiecare tip de pagină, ca bugetele să poată fi reglate din date."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durate = {}     # tip -> [secunde]
+        self._expirate = {}   # tip -> câte au atins bugetul
+
+    def record(self, tip, secunde, ok):
+        with self._lock:
+            self._durate.setdefault(tip, []).append(secunde)
+            if not ok:
+                self._expirate[tip] = self._expirate.get(tip, 0) + 1
+
+    def summary(self):
+        """{tip: {n, p50, p95, max, timeouts}} în secunde."""
+        with self._lock:
+            rez = {}
+            for tip, durate in self._durate.items():
+                d = sorted(durate)
+                rez[tip] = {
+                    "n": len(d),
+                    "p50": round(d[len(d) // 2], 3),
+                    "p95": round(d[min(len(d) - 1, int(len(d) * 0.95))], 3),
+                    "max": round(d[-1], 3),
+                    "timeouts": self._expirate.get(tip, 0),
+                }
+            return rez
+
+    def reset(self):
+        with self._lock:
+            self._durate.clear()
+            self._expirate.clear()
+
+readiness_stats = ReadinessStats()
+
+def asteapta_pagina(d, tip, *conditii, budget=None) -> bool:
+    """
+    Așteaptă până când toate condițiile sunt adevărate (implicit: DOM ready), cel mult
+    READY_BUDGETS[tip] secunde. Timpul real intră în readiness_stats. True dacă au fost îndeplinite.
+    """
+    conditii = conditii or (dom_ready,)
+    budget = READY_BUDGETS.get(tip, 3.0) if budget is None else budget
+    start = time.monotonic()
+    ok = False
+    while True:
+        if all(c(d) for c in conditii):
+            ok = True
+            break
+        if time.monotonic() - start >= budget:
+            break
+        time.sleep(READY_POLL)
+    readiness_stats.record(tip, time.monotonic() - start, ok)
+    return ok
+
+def safe_get(driver, url, attempts=2, tip=None, conditii=(), slot=None):
+    """
+    driver.get() tolerant; la erori de conexiune repornește browserul slotului (sau pe cel implicit).
+    Cu tip, așteaptă condițiile paginii (asteapta_pagina) și oprește încărcarea dacă bugetul expiră.
+    """
+    with cronometru(f"{tip}_load" if tip else "page_load"):
+        return _safe_get(driver, url, attempts, tip, conditii, slot)
+
+def _safe_get(driver, url, attempts, tip, conditii, slot):
     last_exc = None
     for i in range(attempts):
+        if i:
+            numara("retries")
         try:
+            if tip:
+                aplica_profil_blocare(driver, tip)
+            numara_navigare(driver)
             driver.get(url)
-            # dacă ai page_load_strategy="none": fă un mic sleep + window.stop()
-            if load_stop_after and i == 0:
-                time.sleep(load_stop_after)
+            # page_load_strategy="none": get() se întoarce imediat, așteptăm noi pagina
+            if tip and not asteapta_pagina(driver, tip, *conditii):
                 try:
                     driver.execute_script("window.stop();")
                 except Exception:
@@ -169,18 +1046,23 @@ def safe_get(driver, url, attempts=2, load_stop_after=3):
         except WebDriverException as e:
             last_exc = e
             # la erori de conexiune cu localhost (ReadTimeout) restart driverul
-            try:
-                driver.quit()
-            except Exception:
-                pass
-            driver = ensure_driver()
+            if slot is None:
+                ensure_driver()
+                slot = _default_slot
+            driver = slot.restart()
+            if driver is None:
+                break
     # dacă tot pică:
     raise last_exc
 
 def accept_google_consent(d):
     """Închide dialogul de consimțământ Google (cookies/terms), dacă apare."""
+    with cronometru("consent"):
+        _accept_google_consent(d)
+
+def _accept_google_consent(d):
     try:
-        time.sleep(0.5)
+        asteapta_pagina(d, "consent")
         # dacă e într-un iframe
         iframes = d.find_elements(By.CSS_SELECTOR, "iframe[src*='consent']")
         if iframes:
@@ -218,6 +1100,7 @@ def is_captcha_page(d) -> bool:
         if "/sorry/" in d.current_url.lower():
             return True
         html = d.page_source.lower()
+        numara("page_bytes", len(html))
         if "our systems have detected unusual traffic" in html:
             return True
         return False
@@ -227,23 +1110,125 @@ def is_captcha_page(d) -> bool:
 def find_knowledge_panel(d, timeout=3):
     """Caută și returnează elementul knowledge panel din dreapta (SERP)."""
     wait = WebDriverWait(d, timeout)
-    selectors = [
-        "#rhs",                       # layout clasic
-        "div[role='complementary']",  # unele layout-uri
-        "div[data-attrid='title']"    # fallback pe titlu
-    ]
-    for sel in selectors:
+    # layout clasic, unele layout-uri, fallback pe titlu
+    for sel in PANEL_SELECTORS:
         try:
             return wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, sel)))
         except:
             continue
     return None
 
+"""=== Citirea panoului dintr-un singur execute_script ==="""
+
+# "script": tot panoul într-un singur drum dus-întors la chromedriver;
+# "webdriver": calea veche, element cu element (rămâne și ca fallback dacă scriptul pică)
+PANEL_EXTRACTION_MODE = "script"
+
+PANEL_SELECTORS = ["#rhs", "div[role='complementary']", "div[data-attrid='title']"]
+
+PANEL_XPATHS = {
+    "permanently_closed": ".//span[normalize-space()='Permanently closed']",
+    "temporarily_closed": ".//span[normalize-space()='Temporarily closed']",
+    "address": ".//div[contains(@data-attrid,'kc:/location/location:address')]",
+    "address_fallback": ".//span[contains(@class,'LrzXr')]",
+    "site_links": ".//a[.//span[text()='Site'] or .//span[text()='Website']]",
+    "http_links": ".//a[contains(@href,'http')]",
+    "facebook_links": ".//a[contains(@href,'facebook.com')]",
+    "maps_links": ".//a[contains(@href,'/maps/place/')]",
+    "title": "descendant-or-self::div[@data-attrid='title']",
+    "hours": ".//div[contains(@data-attrid,'location:hours')]",
+}
+
+# aceleași selectoare și XPath-uri ca pe calea webdriver, evaluate în pagină
+PANEL_JS = """
+var sels = arguments[0], xps = arguments[1], panel = null;
+for (var i = 0; i < sels.length && !panel; i++) panel = document.querySelector(sels[i]);
+if (!panel) return null;
+function all(q) {
+    var r = document.evaluate(q, panel, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null), out = [];
+    for (var i = 0; i < r.snapshotLength; i++) out.push(r.snapshotItem(i));
+    return out;
+}
+function hrefs(q) { return all(q).map(function (a) { return a.href || a.getAttribute('href') || ''; }); }
+var addr = all(xps.address)[0] || all(xps.address_fallback)[0];
+var title = all(xps.title)[0];
+return {
+    text: panel.innerText || '',
+    title: title ? (title.innerText || title.textContent || '').trim() : '',
+    has_hours: all(xps.hours).length > 0,
+    permanently_closed: all(xps.permanently_closed).length > 0,
+    temporarily_closed: all(xps.temporarily_closed).length > 0,
+    address: addr ? (addr.innerText || addr.textContent || '') : null,
+    site_links: hrefs(xps.site_links),
+    http_links: hrefs(xps.http_links),
+    facebook_links: hrefs(xps.facebook_links),
+    maps_links: hrefs(xps.maps_links)
+};
+"""
+
+def citeste_panou_js(d):
+    """Datele panoului ca dict (vezi PANEL_JS), sau None dacă pagina nu are panou."""
+    return d.execute_script(PANEL_JS, PANEL_SELECTORS, PANEL_XPATHS)
+
+def card_din_panou(date, tara):
+    """Rezultatul lui gaseste_cartela_google din datele lui citeste_panou_js, fără alte apeluri la DOM."""
+    if date.get("permanently_closed"):
+        closure_status = "Permanently closed"
+    elif date.get("temporarily_closed"):
+        closure_status = "Temporarily closed"
+    else:
+        closure_status = "Active"
+
+    address = date.get("address")
+    address = address.strip() if address is not None else "N/A"
+
+    website = None
+    site_links = date.get("site_links") or []
+    if site_links:
+        candidate = site_links[0]
+        if candidate and not any(dom in candidate.lower() for dom in EXCLUDED_DOMAINS):
+            website = candidate
+    else:
+        for href in date.get("http_links") or []:
+            href_l = (href or "").lower()
+            if ("facebook.com" in href_l or
+                "google." in href_l or
+                "support.google" in href_l or
+                "/maps/" in href_l or
+                any(dom in href_l for dom in EXCLUDED_DOMAINS)):
+                continue
+            website = href
+            break
+
+    facebook = None
+    for href in date.get("facebook_links") or []:
+        if href and "facebook.com" in href and not href.endswith("sharer.php"):
+            facebook = href
+            break
+
+    maps_links = date.get("maps_links") or []
+    return {
+        "found": True,
+        "site": website,
+        "facebook": facebook,
+        "phones": extrage_numere(date.get("text") or "", country=tara),
+        "company_name_found": (date.get("title") or "").strip() or "N/A",
+        "address": address,
+        "closure_status": closure_status,
+        "maps_href": maps_links[0] if maps_links else None,
+        # statusul e sigur dacă panoul arată "closed" sau programul de lucru
+        "status_from_panel": closure_status != "Active" or bool(date.get("has_hours")),
+        "maps_checked": False,
+    }
+
 # Afișare frumoasă (cu + dacă e nevoie)
 def pretty_format(n, tara):
     """Afișează numărul cu + dacă are prefixul corect de țară"""
-    prefix_digits = re.sub(r'\D', '', (country_rules.get(tara, {}).get("code", "")))
-    return ('+' + n) if prefix_digits and n.startswith(prefix_digits) else n
+    rule = get_country_rule(tara)
+    if not (rule and rule.prefix):
+        return n
+    # fără prefixul rândului, un număr normalizat e unul străin, deja în E.164 (+44 ...)
+    return ('+' + n) if n.startswith(rule.prefix) or potrivire_prefix(n) else n
 
 
 def switch_to_last_window(d):
@@ -305,39 +1290,123 @@ def _cleanup_phone_str(s: str) -> str:
     s = re.sub(r'[^\d+]', '', s)         # keep only digits and a possible leading '+'
     return s
 
-def _digits_count(s: str) -> int:
-    return len(re.sub(r'\D', '', s or ''))
+CONTEXT_WINDOW = 50   # caractere de context în stânga/dreapta unui număr
+# cât poate avea un meci ban/suspect înaintea ultimului cuvânt (ex. "registration" + spații + "no")
+_BAN_HEAD_MAX = 24
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'   # aceeași definiție ca \w / \b din re
 
-def extrage_numere(text: str, country: str = None):
+class BanIndex:
+    """
+    Zonele interzise dintr-un text (meciurile CONTEXT_BAN_RE și SUSPECT_PATTERN_RE), găsite
+    într-o singură trecere peste zonele cu candidați și ținute sortate. Pentru fiecare candidat
+    se face o căutare binară în loc să rulăm regex-urile mari pe toată fereastra lui de context.
+    """
+
+    def __init__(self, text: str, windows):
+        """windows = ferestrele de context (left, right) ale candidaților, în ordinea din text."""
+        self.text = text
+        # indexăm doar zonele din jurul candidaților (ferestrele lipite/suprapuse se unesc)
+        regions = []
+        for left, right in windows:
+            if regions and left <= regions[-1][1] + 1:
+                regions[-1][1] = max(regions[-1][1], right)
+            else:
+                regions.append([left, right])
+        self.spans = []
+        for rx in (CONTEXT_BAN_RE, SUSPECT_PATTERN_RE):
+            # meciurile aceluiași regex nu se suprapun, deci start-urile și end-urile sunt ambele sortate
+            starts, ends = [], []
+            for left, right in regions:
+                for m in rx.finditer(text, left, min(len(text), right + 1)):
+                    starts.append(m.start())
+                    ends.append(m.end())
+            self.spans.append((rx, starts, ends))
+
+    def _in_word(self, i: int) -> bool:
+        """True dacă poziția i taie un cuvânt (acolo \\b se evaluează altfel în fereastră)."""
+        t = self.text
+        return 0 < i < len(t) and _is_word(t[i - 1]) and _is_word(t[i])
+
+    def _tail_start(self, left: int, right: int) -> int:
+        """De unde poate începe un meci care se termină în cuvântul tăiat de marginea dreaptă."""
+        t = self.text
+        j = right - 1
+        while j > left and _is_word(t[j - 1]):
+            j -= 1
+        while j > left and t[j - 1].isspace():
+            j -= 1
+        return max(left, j - _BAN_HEAD_MAX)
+
+    def banned(self, left: int, right: int) -> bool:
+        """
+        Același rezultat ca CONTEXT_BAN_RE.search(ctx) or SUSPECT_PATTERN_RE.search(ctx),
+        cu ctx = text[left:right]. Un meci din text aflat integral în fereastră decide direct;
+        doar marginile ferestrei (cuvinte tăiate, meciuri tăiate) se mai verifică cu regex,
+        pe bucăți scurte.
+        """
+        t = self.text
+        left_cut = self._in_word(left)
+        tail_from = self._tail_start(left, right) if self._in_word(right) else None
+        for rx, starts, ends in self.spans:
+            scan_from = tail_from
+            i = bisect_right(ends, left)      # primul meci care se termină după left
+            while i < len(starts) and starts[i] < right:
+                if starts[i] >= left and ends[i] <= right:
+                    return True               # meci întreg în fereastră
+                p = max(left, starts[i])      # meci tăiat de margine: în fereastră poate ieși altul
+                scan_from = p if scan_from is None else min(scan_from, p)
+                i += 1
+            # cuvânt tăiat la stânga: în fereastră \\b e adevărat chiar la început
+            if left_cut and rx.match(t[left:right]):
+                return True
+            # endpos=right se comportă exact ca sfârșitul ferestrei
+            if scan_from is not None and rx.search(t, scan_from, right):
+                return True
+        return False
+
+def _lungime_tara_ok(digits: str, rule, plus=False) -> bool:
+    """Filtrul de lungime din extrage_numere: partea națională (fără prefix) față de regula țării."""
+    intl = _international(digits, plus, rule)
+    if intl is not None:
+        return _national_length_ok(intl[1][len(intl[0].prefix):], intl[0])
+    prefix = rule.prefix if rule else ""
+    if prefix and digits.startswith(prefix):
+        return _national_length_ok(digits[len(prefix):], rule)
+    return _national_length_ok(digits, rule)
+
+@lru_cache(maxsize=1)
+def _lungime_minima_oricare() -> int:
+    """Cea mai mică lungime acceptată de vreo țară (sau de fallback-ul generic)."""
+    return min([7] + [r.min_length for r in COUNTRY_INDEX.values()])
+
+def _lungime_oricare_ok(digits: str, plus=False) -> bool:
+    # superset al lui _lungime_tara_ok pentru orice țară; filtrul exact se aplică per rând
+    return len(digits) >= _lungime_minima_oricare()
+
+def extrage_numere(text: str, country: str = None, _lungime_ok=None):
     """
     Extract phone-like strings from visible text, excluding
     tax IDs / banking refs / GDPR refs in the nearby context.
-    Enforces 7..15 digits and removes IBAN/GDPR-like patterns.
+    Enforces the country's length rules (7..15 digits if unknown)
+    and removes IBAN/GDPR-like patterns.
     """
     if not text:
         return []
 
-    pattern = re.compile(r'\+?\d[\d\-\s\.\(\)\/]{6,}\d')
-    results = []
-    
-    rules = country_rules.get(country, {})
-    prefix = re.sub(r'\D', '', rules.get("code", ""))
+    if _lungime_ok is None:
+        rule = get_country_rule(country)
+        _lungime_ok = lambda digits, plus: _lungime_tara_ok(digits, rule, plus)
 
-    for m in pattern.finditer(text):
+    # 1) filtrele ieftine (lungime, cod poștal), într-o singură trecere
+    candidati = []
+    for m in PHONE_TEXT_RE.finditer(text):
         raw = m.group(0).strip()
         cleaned = _cleanup_phone_str(raw)
         digits = re.sub(r'\D', '', cleaned)
 
-        # Obținem prefixul pentru țară
-        prefix = re.sub(r'\D', '', country_rules.get(country, {}).get("code", ""))
-
-        # Scoatem prefixul dacă există
-        if prefix and digits.startswith(prefix):
-            national = digits[len(prefix):]
-        else:
-            national = digits
-
-        if not is_valid_length(national, country):
+        if not _lungime_ok(digits, cleaned.startswith('+')):
             continue
 
         # ⚠️ Excludem codurile poștale
@@ -345,17 +1414,20 @@ def extrage_numere(text: str, country: str = None):
             continue
 
         # context ~ 50 chars around the match
-        start, end = m.start(), m.end()
-        left = max(0, start - 50)
-        right = min(len(text), end + 50)
-        ctx = text[left:right]
+        left = max(0, m.start() - CONTEXT_WINDOW)
+        right = min(len(text), m.end() + CONTEXT_WINDOW)
+        candidati.append((raw, cleaned, left, right))
 
-        if CONTEXT_BAN_RE.search(ctx):
-            continue
-        if SUSPECT_PATTERN_RE.search(ctx) or SUSPECT_PATTERN_RE.search(raw):
-            continue
+    if not candidati:
+        return []
 
-        results.append(_cleanup_phone_str(raw))
+    # 2) contextul: căutare binară în zonele interzise
+    ban_index = BanIndex(text, [(left, right) for _, _, left, right in candidati])
+    results = []
+    for raw, cleaned, left, right in candidati:
+        if ban_index.banned(left, right) or SUSPECT_PATTERN_RE.search(raw):
+            continue
+        results.append(cleaned)
 
     return results
 
@@ -370,8 +1442,13 @@ def normalize_with_country_code(phone: str, country: str) -> str:
     if not digits:
         return ''
 
-    prefix = country_rules.get(country, {}).get("code", "")
-    prefix_digits = re.sub(r'\D', '', prefix)
+    rule = get_country_rule(country)
+    # scris internațional cu prefixul altei țări (+44 / 0049 ...): rămâne prefixul numărului
+    intl = _international(digits, _are_plus(phone), rule)
+    if intl is not None:
+        return intl[1]
+
+    prefix_digits = rule.prefix if rule else ""
 
     # 00 + country code
     if prefix_digits and digits.startswith('00' + prefix_digits):
@@ -381,71 +1458,108 @@ def normalize_with_country_code(phone: str, country: str) -> str:
     if prefix_digits and digits.startswith(prefix_digits):
         return digits
 
-    # local/lacking country code -> prepend, drop trunk '0'
+    # local/lacking country code -> prepend, drop trunk '0' (except where it is part of the number)
     if prefix_digits:
-        if country.lower() in ["italy", "italia", "italie", "italien", "italienă", "italiana"]:    
-            local = digits
-        else:    
-            local = digits.lstrip('0')        
+        local = digits if rule.keep_trunk_prefix else digits.lstrip('0')
         return prefix_digits + local
-    
+
     return digits
 
+def _are_plus(phone) -> bool:
+    return (phone or "").lstrip(" \t(").startswith("+")
+
+def _international(digits, plus, rule=None):
+    """
+    (regula, cifrele fără 00) pentru un număr scris internațional (+ sau 00) cu prefixul altei
+    țări decât a rândului, după cel mai lung prefix de țară. None dacă numărul nu e scris
+    internațional, prefixul e necunoscut sau e chiar al rândului (regulile rândului rămân cele de
+    până acum, inclusiv la prefixe comune ca +1 / +7).
+    """
+    if plus:
+        intl = digits
+    elif digits.startswith('00'):
+        intl = digits[2:]
+    else:
+        return None
+    gasit = potrivire_prefix(intl)
+    if gasit is None or (rule is not None and rule.prefix == gasit.prefix):
+        return None
+    return gasit, intl
+
+def _national_length_ok(national: str, rule) -> bool:
+    """Lungimea numărului național (fără prefixul de țară) față de regulile țării."""
+    if rule is None:
+        return 7 <= len(national) <= 15   # fallback generic
+    if rule.fits(len(national)):
+        return True
+    # scris local, cu 0-ul de trunchi în față ("0721 ...", "030 ...")
+    return not rule.keep_trunk_prefix and national.startswith('0') and rule.fits(len(national.lstrip('0')))
+
 def is_valid_length(num: str, country: str) -> bool:
     """Verifică dacă lungimea numărului corespunde regulilor pentru țara dată."""
-    digits = _digits_count(num)
-    rules = country_rules.get(country.lower())  # country_rules încărcat din all_country_phone_rules.json
-    if rules:
-        min_len = rules.get("min_length", 7)
-        max_len = rules.get("max_length", 15)
-        return min_len <= digits <= max_len
-    # fallback generic
-    return 7 <= digits <= 15
-
-def gaseste_cartela_google(query, tara, consola=None):
-    global driver
-
-    d = ensure_driver(consola=consola)
+    digits = re.sub(r'\D', '', num or '')
+    rule = get_country_rule(country)
+    # scris internațional cu prefixul altei țări: lungimea se verifică după țara aceea
+    intl = _international(digits, _are_plus(num), rule)
+    if intl is not None:
+        return _national_length_ok(intl[1][len(intl[0].prefix):], intl[0])
+    if rule is not None and rule.prefix:
+        # număr scris internațional (+39 / 0039 ...): se verifică partea națională
+        if digits.startswith('00' + rule.prefix) and _national_length_ok(digits[2 + len(rule.prefix):], rule):
+            return True
+        if digits.startswith(rule.prefix) and _national_length_ok(digits[len(rule.prefix):], rule):
+            return True
+    return _national_length_ok(digits, rule)
+
+def gaseste_cartela_google(query, tara, consola=None, slot=None, include_maps=True):
+    if slot is None:
+        ensure_driver(consola=consola)
+        slot = _default_slot
+
+    d = slot.get(consola=consola)
     if d is None:
-        return {"found": False}
+        return {"found": False, "error": True}
 
     url = f"https://www.google.com/search?q={query.replace(' ', '+')}&hl=en"
-    safe_get(d, url, attempts=2)
+    marcheaza_prima_cautare(consola)
+    safe_get(d, url, attempts=2, tip="serp", conditii=(dom_ready, selector_prezent(SERP_READY_CSS)), slot=slot)
+    d = slot.get(consola=consola)
+    if d is None:
+        return {"found": False, "error": True}
     accept_google_consent(d)
 
     # captcha handling
+    # fără restart imediat: GoogleScheduler încetinește și rândul e reluat mai târziu
     if is_captcha_page(d):
-        if consola:
-            consola.insert(tk.END, "⚠️ Captcha detected. Restarting browser...\n")
-            consola.see(tk.END); consola.update()
-        try:
-            d.quit()
-        except:
-            pass
-        driver = None
-        d = ensure_driver(consola=consola)
-        if d is None:
-            return {"found": False, "captcha": True}
-        d.get(url)
-        if is_captcha_page(d):
-            if consola:
-                consola.insert(tk.END, "❌ Captcha still present after restart. Skipping.\n")
-                consola.see(tk.END); consola.update()
-            return {"found": False, "captcha": True}
-
-    wait = WebDriverWait(d, 3)
+        numara("captchas")
+        log(consola, "⚠️ Captcha detected.")
+        return {"found": False, "captcha": True}
 
     website = None
     facebook = None
     company_name_found = "N/A"
     closure_status = "N/A"
 
+    if PANEL_EXTRACTION_MODE == "script":
+        try:
+            with cronometru("panel"):
+                asteapta_pagina(d, "panel", selector_prezent(", ".join(PANEL_SELECTORS)))
+                date = citeste_panou_js(d)
+        except WebDriverException as e:
+            log(consola, f"        ℹ️ Panel script failed ({type(e).__name__}), reading it element by element.")
+        else:
+            if not date:
+                log(consola, "        ℹ️ Google card does not exist.")
+                return {"found": False}
+            rezultat = card_din_panou(date, tara)
+            if include_maps and are_nevoie_de_maps(rezultat):
+                completeaza_din_maps(rezultat, consola=consola, slot=slot)
+            return rezultat
+
     try:
         panel = find_knowledge_panel(d, timeout=3)
         if not panel:
-            if consola:
-                consola.insert(tk.END, "        ℹ️ Google card does not exist.\n")
-                consola.see(tk.END); consola.update()
+            log(consola, "        ℹ️ Google card does not exist.")
             return {"found": False}
 
         content = panel.text
@@ -479,7 +1593,6 @@ def gaseste_cartela_google(query, tara, consola=None):
             candidate = site_elem.get_attribute("href")
             if candidate and not any(dom in candidate.lower() for dom in EXCLUDED_DOMAINS):
                 website = candidate
-                time.sleep(1)  # mic delay să nu pară robot
         except:
             try:
                 links = panel.find_elements(By.XPATH, ".//a[contains(@href,'http')]")
@@ -509,58 +1622,252 @@ def gaseste_cartela_google(query, tara, consola=None):
 
         # Google Maps profile
         company_name_found = "N/A"
+        maps_href = None
         try:
             maps_links = panel.find_elements(By.XPATH, ".//a[contains(@href,'/maps/place/')]")
             if maps_links:
                 maps_href = maps_links[0].get_attribute("href")
-                safe_get(d, maps_href, attempts=2)
-                switch_to_last_window(d)
-                accept_google_consent(d)
-
-                WebDriverWait(d, 6).until(
-                    lambda drv: "/maps/place" in drv.current_url or 
-                                drv.find_elements(By.CSS_SELECTOR, "meta[property='og:title']"))
-
-                company_name_found = _extract_name_from_maps(d, wait, consola=consola)
-
-                # verifică și statusul pe Maps
-                if closure_status == "Active":
-                    try:
-                        if d.find_elements(By.XPATH, "//span[normalize-space()='Permanently closed']"):
-                            closure_status = "Permanently closed"
-                        elif d.find_elements(By.XPATH, "//span[normalize-space()='Temporarily closed']"):
-                            closure_status = "Temporarily closed"
-                    except:
-                        pass
-        except Exception as e:
-            if consola:
-                consola.insert(tk.END, f"   ℹ️ Maps open error: {e}\n")
-                consola.see(tk.END); consola.update()
+        except Exception:
+            pass
 
-        return {
+        rezultat = {
             "found": True,
             "site": website,
             "facebook": facebook,
             "phones": numere,
             "company_name_found": company_name_found,
             "address": address,
-            "closure_status": closure_status
+            "closure_status": closure_status,
+            "maps_href": maps_href,
         }
+        if include_maps and are_nevoie_de_maps(rezultat):
+            completeaza_din_maps(rezultat, consola=consola, slot=slot)
+        return rezultat
+
+    except Exception as e:
+        log(consola, f"❌ Error reading the Google Card: {type(e).__name__}")
+        return {"found": False, "error": True}
+
+"""=== Fetch HTTP rapid (fără browser) ==="""
+
+HTTP_FETCH_ENABLED = True       # încearcă întâi un GET simplu; browserul doar dacă e nevoie
+HTTP_MAX_CONCURRENCY = 16       # conexiuni HTTP păstrate deschise per host
+HTTP_TIMEOUT = 8                # secunde (connect + read)
+HTTP_MAX_BYTES = 3_000_000      # nu citim pagini mai mari de atât
+HTTP_MIN_TEXT_CHARS = 200       # sub atâta text vizibil pagina e considerată randată din JS
+HTTP_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en,*;q=0.5",
+}
+# Site-uri care nu dau nimic util fără JavaScript (login wall / SPA)
+BROWSER_ONLY_DOMAINS = ["facebook.com", "fb.com", "instagram.com"]
+
+# Semne că HTML-ul e doar un schelet pentru o aplicație JS
+JS_SHELL_RE = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>'
+    r'|enable\s+javascript|javascript\s+(?:is\s+)?(?:required|disabled)',
+    re.I
+)
+
+_http_lock = threading.Lock()
+_http_pool = None
+
+def _get_http():
+    """PoolManager comun (thread-safe), creat la prima utilizare."""
+    global _http_pool
+    with _http_lock:
+        if _http_pool is None:
+            import urllib3
+            _http_pool = urllib3.PoolManager(
+                num_pools=64,
+                maxsize=HTTP_MAX_CONCURRENCY,
+                headers=HTTP_HEADERS,
+                timeout=urllib3.Timeout(connect=HTTP_TIMEOUT, read=HTTP_TIMEOUT),
+                # fără total: altfel lanțurile http→https→www→/en (3+ redirecturi) ar depăși 2
+                retries=urllib3.Retry(total=None, connect=2, read=2, other=0, redirect=5,
+                                      raise_on_redirect=False),
+            )
+    return _http_pool
+
+class _TextExtractor(HTMLParser):
+    """Text vizibil aproximativ (echivalentul lui body.text) dintr-un HTML static."""
+
+    SKIP = {"script", "style", "noscript", "template", "svg", "head"}
+    BLOCK = {"p", "div", "br", "li", "tr", "td", "th", "section", "article", "footer",
+             "header", "h1", "h2", "h3", "h4", "h5", "h6", "address", "span", "a"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n" if tag != "span" and tag != "a" else " ")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip:
+            self._skip -= 1
+        elif tag in self.BLOCK and tag not in ("span", "a"):
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+def html_to_text(html: str) -> str:
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    text = "".join(parser.parts)
+    text = re.sub(r'[ \t\r\f\v]+', ' ', text)
+    return re.sub(r'\n\s*\n+', '\n', text).strip()
+
+def _doar_browser(url):
+    from urllib3.util import parse_url
+    host = (parse_url(url).host or "").lower()
+    return any(host == dom or host.endswith("." + dom) for dom in BROWSER_ONLY_DOMAINS)
+
+def fetch_http(url, max_bytes=HTTP_MAX_BYTES):
+    """GET simplu prin pool-ul de conexiuni. Întoarce (html, text) sau None dacă nu e HTML utilizabil."""
+    numara("pages_http")
+    with cronometru("page_http"):
+        return _fetch_http(url, max_bytes)
+
+def _fetch_http(url, max_bytes=HTTP_MAX_BYTES):
+    http = _get_http()
+    try:
+        resp = http.request("GET", url, preload_content=False)
+    except Exception:
+        return None
+    try:
+        if resp.status >= 400:
+            return None
+        ctype = (resp.headers.get("Content-Type") or "").lower()
+        if ctype and "html" not in ctype:
+            return None
+        body = resp.read(max_bytes, decode_content=True)
+        numara("page_bytes", len(body))
+    except Exception:
+        return None
+    finally:
+        resp.release_conn()
+
+    m = re.search(r'charset=["\']?([\w\-]+)', ctype) or re.search(rb'<meta[^>]+charset=["\']?([\w\-]+)', body[:4096], re.I)
+    charset = m.group(1) if m else "utf-8"
+    if isinstance(charset, bytes):
+        charset = charset.decode("ascii", "ignore")
+    try:
+        html = body.decode(charset, errors="replace")
+    except LookupError:
+        html = body.decode("utf-8", errors="replace")
+    return html, html_to_text(html)
+
+def pagina_necesita_js(html, text) -> bool:
+    """True dacă pagina pare randată din JavaScript sau nu are text utilizabil."""
+    if len(text) >= HTTP_MIN_TEXT_CHARS:
+        return False
+    # puțin text: totuși, dacă are linkuri tel: nu mai deschidem browserul
+    if PHONE_TEL_RE.search(html):
+        return bool(JS_SHELL_RE.search(html))
+    return True
+
+def completeaza_din_maps(rezultat, consola=None, slot=None):
+    """Deschide profilul Google Maps al cartelei și completează numele și statusul în rezultat."""
+    maps_href = rezultat.get("maps_href")
+    if not maps_href:
+        return rezultat
+    if slot is None:
+        ensure_driver(consola=consola)
+        slot = _default_slot
+    try:
+        d = slot.get(consola=consola)
+        if d is None:
+            return rezultat
+        safe_get(d, maps_href, attempts=2, tip="maps", slot=slot)
+        d = slot.get(consola=consola)
+        switch_to_last_window(d)
+        accept_google_consent(d)
 
+        if not asteapta_pagina(d, "maps_place",
+                               lambda drv: "/maps/place" in drv.current_url or
+                                           bool(drv.find_elements(By.CSS_SELECTOR, "meta[property='og:title']"))):
+            raise TimeoutException("Maps place page did not load")
+
+        rezultat["company_name_found"] = _extract_name_from_maps(d, WebDriverWait(d, 3), consola=consola)
+
+        # verifică și statusul pe Maps
+        if rezultat.get("closure_status") == "Active":
+            try:
+                if d.find_elements(By.XPATH, "//span[normalize-space()='Permanently closed']"):
+                    rezultat["closure_status"] = "Permanently closed"
+                elif d.find_elements(By.XPATH, "//span[normalize-space()='Temporarily closed']"):
+                    rezultat["closure_status"] = "Temporarily closed"
+            except:
+                pass
     except Exception as e:
-        if consola:
-            consola.insert(tk.END, f"❌ Error reading the Google Card: {type(e).__name__}\n")
-            consola.see(tk.END); consola.update()
-        return {"found": False}
+        log(consola, f"   ℹ️ Maps open error: {e}")
+    return rezultat
 
-def extrage_numere_de_pe_pagina(url, tara, consola=None):
-    d = ensure_driver(consola=consola)
+def _numere_brute_din_pagina(html, text):
+    """
+    Numerele de pe pagină înainte de filtrul de țară: (din text, din tel:). Contextul, codurile
+    poștale și tiparele suspecte nu depind de țară, deci rezultatul poate fi refolosit pe rânduri.
+    """
+    din_text = extrage_numere(text, _lungime_ok=_lungime_oricare_ok)
+    din_tel = []
+    for m in PHONE_TEL_RE.findall(html):
+        candidate = _cleanup_phone_str(m)
+        if not SUSPECT_PATTERN_RE.search(candidate):
+            din_tel.append(candidate)
+    return din_text, din_tel
+
+def numere_pentru_tara(brute, tara):
+    """Aplică regulile de lungime ale țării rândului pe numerele brute ale unei pagini."""
+    din_text, din_tel = brute
+    rule = get_country_rule(tara)
+    nums = set()
+    # 1) from visible text (context-filtered)
+    for m in din_text:
+        if _lungime_tara_ok(re.sub(r'\D', '', m), rule, m.startswith('+')) and is_valid_length(m, tara):
+            nums.add(_cleanup_phone_str(m))
+    # 2) from tel: hrefs (length/suspect filters only)
+    for candidate in din_tel:
+        if is_valid_length(candidate, tara):
+            nums.add(candidate)
+    return list(nums)
+
+def _numere_din_pagina(html, text, tara):
+    """Numere din textul vizibil (filtrat pe context) și din linkurile tel:."""
+    return numere_pentru_tara(_numere_brute_din_pagina(html, text), tara)
+
+def _pagina_cu_browser(url, consola=None, slot=None):
+    """(html, text) al paginii deschise în browser; None dacă browserul n-a putut-o citi."""
+    numara("pages_browser")
+    with cronometru("page_browser"):
+        return _citeste_cu_browser(url, consola=consola, slot=slot)
+
+def _citeste_cu_browser(url, consola=None, slot=None):
+    if slot is None:
+        d = ensure_driver(consola=consola)
+    else:
+        d = slot.get(consola=consola)
     if d is None:
-        return []
+        return None
     try:
+        tip = "facebook" if _doar_browser(url) else "website"
+        aplica_profil_blocare(d, tip)
+        numara_navigare(d)
         d.get(url)
+        asteapta_pagina(d, tip, dom_ready, retea_linistita())
         # small scroll to load footer/lazy content
-        time.sleep(1.5)
         try:
             d.execute_script("""
                 if(document.body) {
@@ -568,53 +1875,1290 @@ def extrage_numere_de_pe_pagina(url, tara, consola=None):
                 }                 
             """)
         except Exception as e:
-            if consola:
-                consola.insert(tk.END, f"   ❌ Scroll error: {e}\n")
-                consola.see(tk.END)
-                consola.update()
-        time.sleep(1.0)
+            log(consola, f"   ❌ Scroll error: {e}")
+        asteapta_pagina(d, "scroll", text_stabil())
 
         html = d.page_source
+        numara("page_bytes", len(html))
         try:
             text = d.find_element(By.TAG_NAME, "body").text
         except:
             text = ''
 
-        nums = set()
-        # 1) from visible text (context-filtered)
-        for m in extrage_numere(text, country=tara):
-            if is_valid_length(m, tara):
-                nums.add(_cleanup_phone_str(m))
-        # 2) from tel: hrefs (length/suspect filters only)
-        for m in PHONE_TEL_RE.findall(html):
-            candidate = _cleanup_phone_str(m)
-            if is_valid_length(candidate, tara) and not SUSPECT_PATTERN_RE.search(candidate):
-                nums.add(candidate)
-
-        return list(nums)
+        return html, text
     except Exception as e:
-        if consola:
-            consola.insert(tk.END, f"   ❌ Page parse error: {e}\n")
-            consola.see(tk.END)
-            consola.update()
+        log(consola, f"   ❌ Page parse error: {e}")
+        return None
+
+def _din_http(url, pagina, consola=None):
+    """Rezultatul fetch_http, sau None dacă pagina trebuie deschisă în browser."""
+    if pagina is None:
+        return None
+    html, text = pagina
+    if pagina_necesita_js(html, text):
+        log(consola, f"   ℹ️ {url} looks JS-rendered, opening it in the browser...")
+        return None
+    return pagina
+
+def _citeste_pagina(url, consola=None, slot=None, pool=None):
+    """(html, text): prin HTTP dacă se poate, altfel în browser (din pool, dacă nu e dat un slot)."""
+    if HTTP_FETCH_ENABLED and not _doar_browser(url):
+        pagina = _din_http(url, fetch_http(url), consola=consola)
+        if pagina is not None:
+            return pagina
+    if slot is None and pool is not None:
+        with pool.slot() as slot:
+            return _pagina_cu_browser(url, consola=consola, slot=slot)
+    return _pagina_cu_browser(url, consola=consola, slot=slot)
+
+def _numere_brute_de_pe_pagina(url, consola=None, slot=None, pool=None, memo=None):
+    pagina = _citeste_pagina(url, consola=consola, slot=slot, pool=pool)
+    if pagina is None:
+        return None
+    brute = _numere_brute_din_pagina(*pagina)
+    if CONTACT_CRAWL_ENABLED and not _doar_browser(url):
+        try:
+            brute = cauta_pagini_contact(url, pagina[0], brute, consola=consola, memo=memo)
+        except Exception as e:
+            # paginile de contact sunt un bonus: numerele primei pagini rămân
+            log(consola, f"   ⚠️ Contact pages of {url}: {type(e).__name__}: {e}")
+    return brute
+
+def extrage_numere_de_pe_pagina(url, tara, consola=None, slot=None, pool=None, memo=None):
+    """
+    Numerele de pe o pagină; cu pool, un browser se ia din pool doar dacă HTTP-ul nu ajunge.
+    Cu memo (UrlMemo), o pagină comună mai multor rânduri e descărcată o singură dată.
+    """
+    fetch = lambda: _numere_brute_de_pe_pagina(url, consola=consola, slot=slot, pool=pool, memo=memo)
+    brute = memo.get(url, fetch, consola=consola) if memo is not None else fetch()
+    return numere_pentru_tara(brute, tara) if brute is not None else []
+
+"""=== Paginile de contact ale site-ului (crawler mărginit per domeniu) ==="""
+
+CONTACT_CRAWL_ENABLED = True
+CONTACT_MAX_PAGES = 4             # pagini de contact citite per site, pe lângă prima pagină
+CONTACT_MAX_SECONDS = 10.0        # timp maxim per site
+CONTACT_MAX_BYTES = 2_000_000     # HTML descărcat per site
+CONTACT_CONCURRENCY = 3           # pagini descărcate în paralel pentru un site
+CONTACT_STOP_AFTER_EMPTY = 2      # ne oprim după atâtea pagini la rând fără numere noi
+
+# cuvinte din URL sau din textul linkului, în ordinea priorității (primele sunt vizitate primele)
+CONTACT_KEYWORDS = [
+    "contact", "kontakt", "contatti", "contatto", "contacto", "contato", "kapcsolat", "yhteystiedot",
+    "impressum", "imprint", "legal-notice", "mentions-legales", "aviso-legal", "note-legali",
+    "about", "despre", "uber-uns", "ueber-uns", "chi-siamo", "quienes-somos", "qui-sommes-nous",
+    "o-nas", "over-ons", "om-oss",
+]
+CONTACT_SKIP_EXT_RE = re.compile(r'\.(?:pdf|jpe?g|png|gif|svg|webp|zip|docx?|xlsx?|mp4|mp3)$', re.I)
+LINK_RE = re.compile(r'<a\s[^>]*?href\s*=\s*["\']([^"\']+)["\'][^>]*>(.*?)</a>', re.I | re.S)
+TAG_RE = re.compile(r'<[^>]+>')
+
+_contact_executor = None
+_contact_lock = threading.Lock()
+
+def _contact_pool():
+    global _contact_executor
+    with _contact_lock:
+        if _contact_executor is None:
+            _contact_executor = ThreadPoolExecutor(max_workers=HTTP_MAX_CONCURRENCY,
+                                                   thread_name_prefix="contact")
+    return _contact_executor
+
+def _slug(s):
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r'[^a-z0-9]+', '-', s)
+
+def _acelasi_site(host, baza):
+    host, baza = host.lower().removeprefix("www."), baza.lower().removeprefix("www.")
+    return host == baza or host.endswith("." + baza)
+
+def linkuri_contact(html, base_url, limita=CONTACT_MAX_PAGES):
+    """Linkurile spre pagini de contact de pe același site, cele mai probabile primele."""
+    try:
+        baza = urlsplit(base_url)
+    except ValueError:
         return []
+    vizitate = {canonical_url(base_url)}
+    candidati = []
+    for href, ancora in LINK_RE.findall(html):
+        href = href.split("#", 1)[0].strip()   # /contact#form -> /contact
+        if not href or href.lower().startswith(("mailto:", "tel:", "javascript:")):
+            continue
+        try:
+            url = urljoin(base_url, href)
+            parts = urlsplit(url)
+            parts.hostname, parts.port   # "http://[broken/..." abia aici ridică ValueError
+        except ValueError:
+            continue   # link stricat: îl sărim, nu pierdem pagina
+        if parts.scheme not in ("http", "https") or not _acelasi_site(parts.hostname or "", baza.hostname or ""):
+            continue
+        if CONTACT_SKIP_EXT_RE.search(parts.path):
+            continue
+        cheie = canonical_url(url)
+        if cheie in vizitate:
+            continue
+        text = _slug(parts.path) + " " + _slug(TAG_RE.sub(" ", ancora))
+        scor = next((i for i, cuvant in enumerate(CONTACT_KEYWORDS) if cuvant in text), None)
+        if scor is None:
+            continue
+        vizitate.add(cheie)
+        candidati.append((scor, len(candidati), url))
+    return [url for _, _, url in sorted(candidati)[:limita]]
+
+def _fetch_contact(url, memo=None, max_bytes=HTTP_MAX_BYTES):
+    """(numere brute, octeți descărcați) pentru o pagină de contact; doar HTTP, fără browser."""
+    marime = [0]
+
+    def fetch():
+        pagina = fetch_http(url, max_bytes=max_bytes)
+        if pagina is None:
+            return None
+        marime[0] = len(pagina[0])
+        return None if pagina_necesita_js(*pagina) else _numere_brute_din_pagina(*pagina)
+    brute = memo.get(url, fetch) if memo is not None else fetch()
+    return brute, marime[0]
+
+def _cheie_numar(numar):
+    return re.sub(r'\D', '', numar)[-9:]
+
+def cauta_pagini_contact(url, html, brute, consola=None, memo=None):
+    """
+    Completează numerele brute ale primei pagini cu cele din paginile de contact ale site-ului.
+    Paginile se descarcă în paralel, în limitele CONTACT_MAX_*; ne oprim devreme când paginile
+    noi nu mai aduc numere noi.
+    """
+    linkuri = linkuri_contact(html, url)
+    if not linkuri:
+        return brute
+    din_text, din_tel = list(brute[0]), list(brute[1])
+    vazute = {_cheie_numar(n) for n in din_text + din_tel}
+    termen = time.monotonic() + CONTACT_MAX_SECONDS
+    octeti, citite, fara_noi, noi_total = 0, 0, 0, 0
+    executor = _contact_pool()
+    memo = memo.contact if memo is not None else None
+    ramase = iter(linkuri)
+    in_zbor = {}
+
+    def trimite():
+        # fiecare descărcare primește o parte din bugetul de octeți rămas, deci și paginile aflate
+        # în paralel rămân împreună sub CONTACT_MAX_BYTES
+        liber = CONTACT_MAX_BYTES - octeti - sum(in_zbor.values())
+        if liber <= 0:
+            return False
+        for link in ramase:
+            cota = min(HTTP_MAX_BYTES, max(1, liber // (CONTACT_CONCURRENCY - len(in_zbor))))
+            ctx = contextvars.copy_context()   # metricile rândului și în thread-urile crawlerului
+            in_zbor[executor.submit(ctx.run, _fetch_contact, link, memo, cota)] = cota
+            return True
+        return False
+
+    with cronometru("contact"):
+        for _ in range(CONTACT_CONCURRENCY):
+            if not trimite():
+                break
+        while in_zbor:
+            ramas = termen - time.monotonic()
+            if ramas <= 0:
+                log(consola, f"   ⏱️ Contact pages: time budget reached for {url}")
+                break
+            gata, _ = wait(in_zbor, timeout=ramas, return_when=FIRST_COMPLETED)
+            for fut in gata:
+                in_zbor.pop(fut)
+                try:
+                    pag_brute, marime = fut.result()
+                except Exception:
+                    pag_brute, marime = None, 0
+                citite += 1
+                octeti += marime
+                noi = 0
+                if pag_brute is not None:
+                    pag_text, pag_tel = pag_brute
+                    for lista, tinta in ((pag_text, din_text), (pag_tel, din_tel)):
+                        for n in lista:
+                            if _cheie_numar(n) not in vazute:
+                                vazute.add(_cheie_numar(n))
+                                tinta.append(n)
+                                noi += 1
+                noi_total += noi
+                fara_noi = 0 if noi else fara_noi + 1
+            if fara_noi >= CONTACT_STOP_AFTER_EMPTY or octeti >= CONTACT_MAX_BYTES:
+                break
+            while len(in_zbor) < CONTACT_CONCURRENCY and trimite():
+                pass
+        for fut in in_zbor:
+            fut.cancel()   # cele deja pornite se termină în fundal, rezultatul e ignorat
+
+    numara("contact_pages", citite)
+    if noi_total:
+        log(consola, f"   🔗 Contact pages: {noi_total} more numbers from {citite} pages of {url}")
+    return din_text, din_tel
+
+"""=== Memo pe rulare pentru paginile comune (lanțuri, francize) ==="""
+
+# parametri care nu schimbă pagina, doar urmăresc de unde vine vizita
+TRACKING_PARAMS_RE = re.compile(
+    r'^(utm_\w+|fbclid|gclid|gbraid|wbraid|dclid|msclkid|yclid|igshid|mc_cid|mc_eid|_ga|_gl|ref|ref_src|hsa_\w+)$', re.I)
+
+def canonical_url(url: str) -> str:
+    """Cheia memo-ului: fără schemă, www., fragment, parametri de tracking și / final."""
+    parts = urlsplit(str(url or "").strip())
+    if not parts.netloc and parts.path and "://" not in url:
+        parts = urlsplit("//" + str(url).strip())   # "exemplu.ro/contact", fără schemă
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not TRACKING_PARAMS_RE.match(k))
+    path = parts.path.rstrip("/")
+    return host + path + ("?" + urlencode(query) if query else "")
+
+class UrlMemo:
+    """
+    Numerele brute (înainte de filtrul de țară) pentru fiecare URL deja vizitat în rularea
+    curentă. Cererile simultane pentru același URL așteaptă aceeași descărcare (un Future).
+    """
+
+    def __init__(self, contact=True):
+        self._lock = threading.Lock()
+        self._pagini = {}
+        self.hits = 0
+        self.misses = 0
+        # paginile de contact au memo-ul lor: valoarea e doar pagina (fără crawl), iar un crawl
+        # nu poate aștepta niciodată după alt crawl
+        self.contact = UrlMemo(contact=False) if contact else None
+
+    def get(self, url, fetch, consola=None):
+        key = canonical_url(url)
+        with self._lock:
+            fut = self._pagini.get(key)
+            proprietar = fut is None
+            if proprietar:
+                fut = self._pagini[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not proprietar:
+            log(consola, f"   ♻️ {url}: already visited in this run, reusing its numbers")
+            return fut.result()
 
-def save_dataframe_safely(df: pd.DataFrame, default_name="rezultate_companii.xlsx", consola=None):
+        try:
+            brute = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._pagini.pop(key, None)
+            fut.set_exception(e)
+            raise
+        if brute is None:
+            # browserul n-a putut citi pagina: rândurile următoare pot încerca din nou
+            with self._lock:
+                self._pagini.pop(key, None)
+        fut.set_result(brute)
+        return brute
+
+# memo-ul rulării curente; asyncio.to_thread copiază contextul, deci etapele îl văd
+url_memo_curent = contextvars.ContextVar("url_memo_curent", default=None)
+
+"""=== Cache persistent pentru rezultatele Google (SQLite) ==="""
+
+SERP_CACHE_ENABLED = True
+SERP_CACHE_PATH = "serp_cache.sqlite"
+SERP_CACHE_TTL = 7 * 24 * 3600            # cartele găsite: o săptămână
+SERP_CACHE_TTL_NOT_FOUND = 24 * 3600      # "nu există cartelă": o zi
+SERP_CACHE_MAX_ENTRIES = 50_000           # peste atât se șterg cele mai vechi folosite
+
+def _norm_query(query: str) -> str:
+    s = unicodedata.normalize("NFKC", str(query or "")).casefold()
+    return " ".join(s.replace(",", " ").split())
+
+class SerpCache:
+    """Rezultatele lui gaseste_cartela_google pe disc, cu cheie (query normalizat, țară) și TTL."""
+
+    def __init__(self, path=SERP_CACHE_PATH, ttl=SERP_CACHE_TTL,
+                 ttl_not_found=SERP_CACHE_TTL_NOT_FOUND, max_entries=SERP_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.ttl_not_found = ttl_not_found
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS serp_cache (
+                key TEXT PRIMARY KEY,
+                found INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                expires REAL NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS serp_cache_last_used ON serp_cache(last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def key(query, tara):
+        rule = get_country_rule(tara)
+        return f"{rule.name if rule else _norm_country(tara)}|{_norm_query(query)}"
+
+    def get(self, query, tara):
+        """Dict-ul salvat sau None (lipsă/expirat)."""
+        key = self.key(query, tara)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT payload, expires FROM serp_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._db.execute("DELETE FROM serp_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE serp_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, query, tara, rezultat):
+        if rezultat.get("captcha"):
+            return   # captcha nu spune nimic despre firmă
+        payload = {k: v for k, v in rezultat.items() if k not in ("captcha", "from_cache")}
+        found = bool(payload.get("found"))
+        now = time.time()
+        ttl = self.ttl if found else self.ttl_not_found
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO serp_cache (key, found, payload, expires, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self.key(query, tara), int(found), json.dumps(payload, ensure_ascii=False), now + ttl, now))
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        self._db.execute("DELETE FROM serp_cache WHERE expires < ?", (time.time(),))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM serp_cache").fetchone()
+        if count > self.max_entries:
+            # păstrăm ~90% din limită, cele folosite cel mai recent
+            self._db.execute(
+                "DELETE FROM serp_cache WHERE key IN "
+                "(SELECT key FROM serp_cache ORDER BY last_used LIMIT ?)",
+                (count - int(self.max_entries * 0.9),))
+
+    def close(self):
+        with self._lock:
+            try:
+                self._evict()
+                self._db.commit()
+                self._db.close()
+            except sqlite3.Error:
+                pass
+
+_serp_cache = None
+_serp_cache_lock = threading.Lock()
+
+def get_serp_cache():
+    """Cache-ul comun (deschis la prima utilizare), sau None dacă e dezactivat / nu se poate deschide."""
+    global _serp_cache
+    if not SERP_CACHE_ENABLED:
+        return None
+    with _serp_cache_lock:
+        if _serp_cache is None:
+            try:
+                _serp_cache = SerpCache(SERP_CACHE_PATH)
+            except sqlite3.Error:
+                return None
+        return _serp_cache
+
+def close_serp_cache():
+    global _serp_cache
+    with _serp_cache_lock:
+        if _serp_cache is not None:
+            _serp_cache.close()
+            _serp_cache = None
+
+"""=== Intrare / ieșire în flux (fișiere foarte mari) ==="""
+
+# coloanele din fișierul de intrare de care avem nevoie
+INPUT_COLUMNS = ["Company ID (Link)", "Company Name", "Address Line One", "ZIP", "City",
+                 "Country", "Phone(s)", "DQP Employee Note"]
+# ordinea coloanelor în fișierul de rezultate
+RESULT_COLUMNS = ["Company ID", "Company Name", "Country", "Initial Phones", "DQP Employee Note",
+                  "Matched Company Name", "Google Address", "Unique Phones Found", "Google Phone(s)",
+                  "Facebook Phone(s)", "Website Phone(s)", "Closure Status"]
+
+def citeste_randuri_xlsx(filepath):
+    """
+    (idx, dict) pentru fiecare rând din prima foaie, citit în flux cu openpyxl read-only
+    și doar cu coloanele din INPUT_COLUMNS. Memoria nu depinde de mărimea fișierului.
+    """
+    import openpyxl
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        pozitii = {}
+        for i, h in enumerate(header):
+            h = str(h).strip() if h is not None else ""
+            if h in INPUT_COLUMNS and h not in pozitii:
+                pozitii[h] = i
+        if "Company Name" not in pozitii:
+            raise KeyError("Company Name")
+
+        for idx, values in enumerate(rows, start=1):
+            if not values or all(v is None for v in values):
+                continue
+            yield idx, {col: ("" if i >= len(values) or values[i] is None else values[i])
+                        for col, i in pozitii.items()}
+    finally:
+        wb.close()
+
+def scrie_rezultate_stream(path, rezultate):
+    """Scrie rezultatele pe măsură ce vin: .csv cu modulul csv, altfel xlsx openpyxl write-only."""
+    if path.lower().endswith(".csv"):
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for rezultat in rezultate:
+                writer.writerow(rezultat)
+        return
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(RESULT_COLUMNS)
+    for rezultat in rezultate:
+        ws.append([rezultat.get(col, "") for col in RESULT_COLUMNS])
+    wb.save(path)
+
+"""=== Rezultatele pe disc în timpul rulării (CSV / Parquet), Excel-ul o singură dată ==="""
+
+RESULTS_PATH = "rezultate_companii_live.csv"   # .csv sau .parquet (Parquet cere pyarrow)
+RESULTS_PARQUET_BATCH = 500                     # rânduri per row group Parquet
+
+class ResultWriter:
+    """
+    Fiecare rând terminat ajunge imediat în fișierul de rezultate: CSV cu flush per rând (se poate
+    citi și în timpul rulării) sau Parquet pe loturi. .xlsx-ul se construiește o singură dată din
+    fișierul acesta, la final sau la cerere (render_xlsx).
     """
-    Save df safely:
+
+    def __init__(self, path=RESULTS_PATH, consola=None):
+        self.path = path
+        self.format = "parquet" if path.lower().endswith(".parquet") else "csv"
+        self.randuri = 0
+        self.ordonat = True     # False dacă rândurile n-au venit în ordinea din fișier
+        self._lock = threading.Lock()
+        self._ultimul = 0
+        self._f = self._csv = self._pq = None
+        self._lot = []
+        self._inchis = False
+        if self.format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                self.path = os.path.splitext(path)[0] + ".csv"
+                self.format = "csv"
+                log(consola, f"⚠️ pyarrow is not installed: results are streamed to {self.path} instead.")
+        if self.format == "csv":
+            self._f = open(self.path, "w", encoding="utf-8-sig", newline="")
+            self._csv = csv.DictWriter(self._f, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+            self._csv.writeheader()
+            self._f.flush()
+
+    def append(self, idx, rezultat):
+        with self._lock:
+            if self.randuri and idx <= self._ultimul:
+                self.ordonat = False   # rând reluat sau venit în altă ordine: finalul vine din checkpoint
+            self._ultimul = max(self._ultimul, idx)
+            self.randuri += 1
+            if self._csv is not None:
+                self._csv.writerow(rezultat)
+                self._f.flush()
+            else:
+                self._lot.append(rezultat)
+                if len(self._lot) >= RESULTS_PARQUET_BATCH:
+                    self._scrie_lot()
+
+    def _scrie_lot(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._pq is None:
+            self._pq = pq.ParquetWriter(self.path, pa.schema([(c, pa.string()) for c in RESULT_COLUMNS]))
+        coloane = {c: [None if r.get(c) is None else str(r.get(c)) for r in self._lot] for c in RESULT_COLUMNS}
+        self._pq.write_table(pa.table(coloane, schema=self._pq.schema))
+        self._lot = []
+
+    def close(self):
+        with self._lock:
+            if self._inchis:
+                return
+            self._inchis = True
+            if self._f is not None:
+                self._f.close()
+            elif self.format == "parquet":
+                if self._lot or self._pq is None:
+                    self._scrie_lot()   # și cu 0 rânduri rămâne un fișier Parquet valid
+                self._pq.close()
+
+def citeste_rezultate(path):
+    """Rezultatele dintr-un fișier .csv / .parquet (ResultWriter) sau dintr-un checkpoint .jsonl."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+        for lot in pq.ParquetFile(path).iter_batches():
+            yield from lot.to_pylist()
+    elif ext == ".jsonl":
+        checkpoint = CheckpointLog(path, resume=True)
+        try:
+            yield from checkpoint.iter_rezultate()
+        finally:
+            checkpoint.close()
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for rezultat in csv.DictReader(f):
+                if None in rezultat.values():
+                    continue   # ultima linie, încă în curs de scriere
+                yield rezultat
+
+def render_xlsx(path, output=None, consola=None):
+    """Construiește .xlsx-ul (sau .csv) din fișierul de rezultate, cu fallback-urile obișnuite."""
+    if output is None:
+        output = f"rezultate_companii_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return save_rows_safely(lambda: citeste_rezultate(path), output, consola=consola)
+
+"""=== Checkpoint (jurnal append-only) și reluare ==="""
+
+CHECKPOINT_PATH = "rezultate_companii_checkpoint.jsonl"
+
+def text_celula(valoare):
+    """Valoarea unei celule ca text; celulele goale (None, sau NaN la pandas) devin ""."""
+    if valoare is None or (isinstance(valoare, float) and valoare != valoare):
+        return ""
+    return str(valoare)
+
+def cheie_rand(idx, id_link):
+    """Cheia după care un rând e recunoscut la reluare: Company ID (Link), sau numărul rândului."""
+    return text_celula(id_link).strip() or f"#{idx}"
+
+def _ultima_per_rand(intrari):
+    """Un rând reluat (după _retry) apare de două ori: rămâne ultima intrare, cea din reluare."""
+    precedenta = None
+    for e in intrari:
+        if precedenta is not None and precedenta.get("_row") != e.get("_row"):
+            yield precedenta
+        precedenta = e
+    if precedenta is not None:
+        yield precedenta
+
+class CheckpointLog:
+    """
+    Fiecare rând terminat e adăugat imediat într-un fișier JSONL (flush + fsync), deci după
+    un crash sau Stop nu se pierde nimic și rularea poate fi reluată de unde a rămas.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH, resume=False):
+        self.path = path
+        self._lock = threading.Lock()
+        if not resume and os.path.exists(path) and os.path.getsize(path) > 0:
+            # o rulare nouă nu suprascrie jurnalul vechi, îl păstrează alături
+            name, ext = os.path.splitext(path)
+            os.replace(path, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}")
+        self._f = open(path, "a", encoding="utf-8")
+        if self._f.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._f.write("\n")   # linie ruptă de un crash: următoarea intrare începe curat
+
+    def _citeste(self, start=0, end=None):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            while end is None or f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue   # ultima linie poate fi scrisă pe jumătate la un crash
+
+    def _segmente(self):
+        """Offset-urile (start, end) ale porțiunilor în care _row crește (una per rulare/reluare)."""
+        if not os.path.exists(self.path):
+            return []
+        starts, prev, pos = [0], None, 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    row = json.loads(line).get("_row", 0)
+                except ValueError:
+                    row = None
+                if row is not None:
+                    if prev is not None and row < prev:
+                        starts.append(pos)
+                    prev = row
+                pos += len(line)
+        return list(zip(starts, starts[1:] + [pos]))
+
+    def chei_terminate(self):
+        # rândurile cu _retry (eroare la o etapă) sunt reluate la --resume
+        return {e.get("_key") for e in self._citeste() if not e.get("_retry")}
+
+    def append(self, idx, rezultat):
+        key = cheie_rand(idx, rezultat.get("Company ID"))
+        line = json.dumps({"_row": idx, "_key": key, **rezultat}, ensure_ascii=False)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    def rezultate(self):
+        """Toate rezultatele din jurnal, în ordinea rândurilor din fișierul de intrare."""
+        return list(self.iter_rezultate())
+
+    def iter_rezultate(self):
+        """
+        Ca rezultate(), dar în flux: fiecare rulare a scris deja în ordine, deci ajunge un
+        heapq.merge între segmentele crescătoare, fără să țină jurnalul întreg în memorie.
+        """
+        for e in self.iter_intrari():
+            yield {k: v for k, v in e.items() if not k.startswith("_")}
+
+    def iter_intrari(self):
+        """Intrările brute (cu _row și _key), în ordinea rândurilor."""
+        with self._lock:
+            if not self._f.closed:
+                self._f.flush()
+        segmente = [self._citeste(a, b) for a, b in self._segmente()]
+        return _ultima_per_rand(heapq.merge(*segmente, key=lambda e: e.get("_row", 0)))
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+"""=== Adâncimea verificării (niveluri de îmbogățire) ==="""
+
+# fiecare nivel le include pe cele dinainte
+ENRICHMENT_TIERS = ["card", "maps", "website", "facebook"]
+ENRICHMENT_TIER = "facebook"   # implicit: tot (comportamentul de până acum)
+MAPS_LAZY = True               # Maps doar dacă panoul nu dă deja numele și statusul
+NOT_CHECKED = "Not checked"    # valoarea coloanelor sărite din cauza nivelului ales
+
+def nivel_activ(nivel, tier=None):
+    """True dacă nivelul ales (implicit ENRICHMENT_TIER) include nivelul dat."""
+    tier = tier or ENRICHMENT_TIER
+    return ENRICHMENT_TIERS.index(nivel) <= ENRICHMENT_TIERS.index(tier)
+
+def are_nevoie_de_maps(card):
+    """Profilul Maps se deschide doar dacă aduce ceva: numele sau un status nesigur."""
+    if card.get("maps_checked") or not card.get("maps_href"):
+        return False
+    if not MAPS_LAZY:
+        return True
+    nume = (card.get("company_name_found") or "").strip()
+    return nume in ("", "N/A") or not card.get("status_from_panel")
+
+"""=== Ritmul căutărilor Google: token bucket, backoff și circuit breaker ==="""
+
+GOOGLE_RATE = 0.5              # căutări pe secundă la pornire (toate browserele la un loc)
+GOOGLE_RATE_MIN = 0.05         # cel mai lent ritm după captcha-uri repetate
+GOOGLE_RATE_MAX = 1.0
+GOOGLE_BURST = 2               # câte căutări pot pleca una după alta
+GOOGLE_RECOVERY_STEP = 0.05    # cât crește ritmul după GOOGLE_RECOVERY_AFTER căutări fără captcha
+GOOGLE_RECOVERY_AFTER = 10
+GOOGLE_BACKOFF_BASE = 20.0     # pauza după primul captcha (secunde), dublată la fiecare captcha consecutiv
+GOOGLE_BACKOFF_MAX = 600.0
+GOOGLE_BREAKER_THRESHOLD = 3   # captcha-uri consecutive după care Google e oprit de tot...
+GOOGLE_BREAKER_COOLDOWN = 900.0  # ...pentru atâtea secunde, apoi o singură căutare de probă
+SERP_CAPTCHA_MAX_RETRIES = 4   # de câte ori e reluat un rând lovit de captcha
+
+class GoogleScheduler:
+    """
+    Poarta prin care trec toate căutările Google. Token bucket cu ritm adaptiv: la captcha
+    ritmul se înjumătățește și urmează o pauză exponențială cu jitter; după prea multe
+    captcha-uri consecutive circuitul se deschide (doar etapa Google stă), apoi o căutare de
+    probă decide dacă se închide. Fără captcha-uri, ritmul revine treptat.
+    """
+
+    def __init__(self, rate=GOOGLE_RATE, rate_min=GOOGLE_RATE_MIN, rate_max=GOOGLE_RATE_MAX,
+                 burst=GOOGLE_BURST):
+        self.rate = rate
+        self.rate_min = rate_min
+        self.rate_max = rate_max
+        self.burst = burst
+        self._tokens = float(burst)
+        self._ultima = time.monotonic()
+        self._pauza_pana = 0.0
+        self._consecutive = 0
+        self._succese = 0
+        self.erori = 0             # căutări eșuate din alte motive decât captcha (Chrome, excepții)
+        self._deschis = False      # circuit breaker deschis
+        self._proba = False        # o căutare de probă e în curs (half-open)
+        self._cooldown = GOOGLE_BREAKER_COOLDOWN
+        self._cond = threading.Condition()
+        self.stop_flag = None      # threading.Event al rulării; acquire() renunță la Stop
+
+    def _reumple(self, acum):
+        self._tokens = min(self.burst, self._tokens + (acum - self._ultima) * self.rate)
+        self._ultima = acum
+
+    def acquire(self):
+        """Blochează până când o căutare are voie să plece. False dacă rularea a fost oprită."""
+        with self._cond:
+            while True:
+                if self.stop_flag is not None and self.stop_flag.is_set():
+                    return False
+                acum = time.monotonic()
+                self._reumple(acum)
+                if acum < self._pauza_pana:
+                    asteptare = self._pauza_pana - acum
+                elif self._deschis and self._proba:
+                    asteptare = 1.0            # altcineva face proba
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    if self._deschis:
+                        self._proba = True     # half-open: doar căutarea asta trece
+                    return True
+                else:
+                    asteptare = (1 - self._tokens) / self.rate
+                self._cond.wait(min(asteptare, 1.0))   # verificăm Stop cel puțin o dată pe secundă
+
+    def on_success(self, consola=None):
+        with self._cond:
+            self._consecutive = 0
+            if self._deschis:
+                self._deschis = self._proba = False
+                self._cooldown = GOOGLE_BREAKER_COOLDOWN
+                log(consola, f"🟢 Google searches resumed at {self.rate:.2f}/s.")
+            self._succese += 1
+            if self._succese >= GOOGLE_RECOVERY_AFTER and self.rate < self.rate_max:
+                self._succese = 0
+                self.rate = min(self.rate_max, self.rate + GOOGLE_RECOVERY_STEP)
+            self._cond.notify_all()
+
+    def on_error(self):
+        """Căutarea a eșuat fără un răspuns Google: nu spune nimic despre captcha, dar eliberează proba."""
+        with self._cond:
+            self.erori += 1
+            self._proba = False
+            self._cond.notify_all()
+
+    def on_captcha(self, consola=None):
+        with self._cond:
+            self._consecutive += 1
+            self._succese = 0
+            self.rate = max(self.rate_min, self.rate / 2)
+            self._tokens = 0.0
+            if self._deschis or self._consecutive >= GOOGLE_BREAKER_THRESHOLD:
+                if self._deschis:
+                    self._cooldown = min(self._cooldown * 2, 4 * GOOGLE_BREAKER_COOLDOWN)
+                self._deschis, self._proba = True, False
+                pauza = self._cooldown * random.uniform(0.9, 1.1)
+                log(consola, f"🔴 {self._consecutive} captchas in a row: Google searches paused for "
+                             f"{pauza / 60:.0f} min (websites and Facebook continue).")
+            else:
+                pauza = min(GOOGLE_BACKOFF_MAX, GOOGLE_BACKOFF_BASE * 2 ** (self._consecutive - 1))
+                pauza *= random.uniform(0.5, 1.5)
+                log(consola, f"⏸️ Captcha: slowing Google searches to {self.rate:.2f}/s, "
+                             f"pausing {pauza:.0f}s.")
+            self._pauza_pana = max(self._pauza_pana, time.monotonic() + pauza)
+            self._cond.notify_all()
+
+google_scheduler = GoogleScheduler()
+
+"""=== Pre-normalizarea coloanelor Phone(s) și DQP Employee Note, pentru tot tabelul ==="""
+
+PRE_PHONES_COL = "_phones_initiale"   # frozenset cu telefoanele inițiale canonice (E.164 fără '+')
+PRE_NOTE_COL = "_numere_nota"         # frozenset cu numerele canonice din notă
+PRE_REPORT_MAX = 20                   # câte rânduri neparsabile apar în jurnal
+
+def _bucati_telefon(phone_col):
+    """Bucățile din Phone(s), separate prin ; sau , și fără sufixele '(x/y)'."""
+    for p in re.split(r'[;,]', phone_col or ''):
+        p_curat = re.sub(r'\([^)]*\)', '', p.strip()).strip()
+        if p_curat:
+            yield p_curat
+
+def telefoane_initiale(phone_col, tara):
+    """Initial phones -> canonical E.164 (no '+')."""
+    return {nrm for nrm in (normalize_with_country_code(p, tara) for p in _bucati_telefon(phone_col)) if nrm}
+
+def numere_din_nota(nota, tara):
+    return {n for n in (normalize_with_country_code(x, tara) for x in extrage_numere(nota, country=tara)) if n}
+
+def _motiv_neparsabil(tel, tara, nrm):
+    if not nrm:
+        return "no digits"
+    if get_country_rule(tara) is None:
+        return "unknown country"
+    if not is_valid_length(tel, tara):
+        return f"invalid length for {tara}"
+    return None
+
+def _coloana_text(df, col):
+    import pandas as pd
+    if col not in df:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[col].fillna("").astype(str)
+
+def preproceseaza_telefoane(df, consola=None):
+    """
+    Calculează o singură dată, pentru tot tabelul, telefoanele inițiale și numerele din notă
+    (coloanele PRE_PHONES_COL / PRE_NOTE_COL, folosite de RowJob). Split-ul și curățarea se fac
+    vectorizat; normalizarea rulează o dată per (țară, valoare) distinctă. Rândurile cu telefoane
+    care nu pot fi interpretate sunt raportate înainte de orice căutare.
+    Întoarce lista [(idx, telefon, motiv)].
+    """
+    import pandas as pd
+    start = time.perf_counter()
+    tari = _coloana_text(df, "Country")
+    note = _coloana_text(df, "DQP Employee Note")
+
+    bucati = _coloana_text(df, "Phone(s)").str.split(r"[;,]", regex=True).explode()
+    bucati = bucati.str.strip().str.replace(r"\([^)]*\)", "", regex=True).str.strip()
+    bucati = bucati[bucati.fillna("") != ""]
+    perechi = pd.DataFrame({"tara": tari.loc[bucati.index].to_numpy(), "tel": bucati.to_numpy()},
+                           index=bucati.index)
+
+    normalizate, motive = {}, {}
+    for tara, grup in perechi.groupby("tara", sort=False):
+        for tel in grup["tel"].unique():
+            nrm = normalize_with_country_code(tel, tara)
+            normalizate[(tara, tel)] = nrm
+            motive[(tara, tel)] = _motiv_neparsabil(tel, tara, nrm)
+    chei = list(zip(perechi["tara"], perechi["tel"]))
+    perechi["nrm"] = [normalizate[k] for k in chei]
+    seturi = perechi[perechi["nrm"] != ""].groupby(level=0)["nrm"].agg(frozenset)
+    df[PRE_PHONES_COL] = [seturi.get(i, frozenset()) for i in df.index]
+
+    numere_nota = {}
+    cu_nota = pd.DataFrame({"tara": tari, "nota": note})[note != ""]
+    for tara, grup in cu_nota.groupby("tara", sort=False):
+        for nota in grup["nota"].unique():
+            numere_nota[(tara, nota)] = frozenset(numere_din_nota(nota, tara))
+    df[PRE_NOTE_COL] = [numere_nota.get(k, frozenset()) for k in zip(tari, note)]
+
+    neparsabile = [(idx, tel, motive[(tara, tel)]) for idx, (tara, tel) in zip(perechi.index, chei)
+                   if motive[(tara, tel)]]
+    log(consola, f"🧮 Phones pre-normalised for {len(df)} rows ({len(normalizate)} distinct phones, "
+                 f"{len(numere_nota)} distinct notes) in {time.perf_counter() - start:.2f}s")
+    if neparsabile:
+        randuri = sorted({idx for idx, _, _ in neparsabile})
+        log(consola, f"⚠️ {len(randuri)} rows have Phone(s) values that could not be parsed:",
+            unparseable_rows=len(randuri))
+        for idx, tel, motiv in neparsabile[:PRE_REPORT_MAX]:
+            log(consola, f"   row {idx}: '{tel}' ({motiv})", row=idx)
+        if len(neparsabile) > PRE_REPORT_MAX:
+            log(consola, f"   ... and {len(neparsabile) - PRE_REPORT_MAX} more")
+    return neparsabile
+
+"""=== Pipeline pe etape: SERP -> Maps -> website -> Facebook ==="""
+
+# Câte rânduri lucrează simultan fiecare etapă. Google trebuie ținut în frâu, site-urile nu.
+PIPELINE_LIMITS = {"serp": 2, "maps": 2, "website": 8, "facebook": 2}
+PIPELINE_QUEUE_SIZE = 4        # locuri în coada dintre două etape
+PIPELINE_MAX_IN_FLIGHT = 24    # rânduri începute și încă neemise (memoria rămâne constantă)
+
+@dataclass
+class RowJob:
+    """Starea unui rând (o companie) pe parcursul etapelor."""
+    seq: int
+    idx: int
+    companie: str
+    id_link: str
+    adresa: str
+    zip_code: str
+    city: str
+    tara: str
+    phone_col: str
+    nota: str
+    phones_initiale: set = field(default_factory=set)
+    card: dict = None
+    card_query: str = None      # varianta de căutare care a găsit cartela
+    din_cache: bool = False
+    site_nums: list = None
+    fb_nums: list = None
+    eroare: str = None
+    reincercabil: bool = False  # eroare la o etapă: rândul e scris, dar reluat la --resume
+    anulat: bool = False
+    metrics: RowMetrics = None
+    numere_nota: frozenset = None   # precalculat de preproceseaza_telefoane (altfel în rezultat_rand)
+
+    @classmethod
+    def din_rand(cls, seq, idx, row):
+        job = cls(
+            seq=seq,
+            idx=idx,
+            companie=str(row["Company Name"]),
+            id_link=text_celula(row.get("Company ID (Link)")),
+            adresa=str(row.get("Address Line One", "") or ""),
+            zip_code=str(row.get("ZIP", "") or ""),
+            city=str(row.get("City", "") or ""),
+            tara=str(row.get("Country", "") or ""),
+            phone_col=str(row.get("Phone(s)", "") or ""),
+            nota=str(row.get("DQP Employee Note", "") or ""),
+        )
+        # Initial phones -> canonical E.164 (no '+'), strip any '(x/y)' suffixes
+        initiale = row.get(PRE_PHONES_COL)
+        if isinstance(initiale, frozenset):
+            job.phones_initiale = set(initiale)
+            job.numere_nota = row.get(PRE_NOTE_COL)
+        else:
+            job.phones_initiale = telefoane_initiale(job.phone_col, job.tara)
+        job.metrics = RowMetrics(idx)
+        return job
+
+    @property
+    def detalii(self):
+        """Are sens să mai căutăm pe site/Facebook (cartelă găsită și firma nu e închisă)."""
+        return bool(self.card) and self.card.get("closure_status") != "Permanently closed"
+
+def etapa_serp(job, pool, consola=None):
+    log(consola, f"\n📦 [{job.idx}] {job.companie}:")
+    variante_cautare = [
+        f"{job.companie} {job.adresa} {job.zip_code} {job.city} {job.tara}",
+        f"{job.companie} {job.city} {job.tara}",
+    ]
+    cache = get_serp_cache()
+    eroare = False
+    for query in variante_cautare:
+        log(consola, f"   🔍 [{job.idx}] Searching: {query}")
+        rezultat = cache.get(query, job.tara) if cache else None
+        if rezultat is not None:
+            log(consola, f"   💾 [{job.idx}] Cached result")
+            job.din_cache = True
+        else:
+            rezultat = _cauta_google(job, query, pool, consola=consola)
+            if rezultat is None:
+                return   # oprit de utilizator sau captcha persistent
+            # doar „cartela nu există” intră în cache; un Chrome căzut nu spune nimic despre firmă
+            if cache and not rezultat.get("found") and not rezultat.get("error"):
+                cache.put(query, job.tara, rezultat)
+        if not rezultat.get("found"):
+            eroare = eroare or bool(rezultat.get("error"))
+            continue
+        log(consola, f"   ✅ [{job.idx}] Google card found")
+        job.card = rezultat
+        job.card_query = query
+        return
+    if eroare:
+        job.eroare = "Google card could not be read"
+        job.reincercabil = True   # --resume o caută din nou
+        log(consola, f"   ❌ [{job.idx}] {job.eroare}")
+        return
+    log(consola, f"   ❌ [{job.idx}] No matching Google business card found")
+
+def _cauta_google(job, query, pool, consola=None):
+    """
+    O căutare prin google_scheduler. La captcha rândul e pus înapoi la coadă (aceeași căutare,
+    după pauza impusă de scheduler), fără să țină browserul ocupat cât așteaptă.
+    None dacă rularea a fost oprită sau captcha-ul nu a trecut după SERP_CAPTCHA_MAX_RETRIES.
+    """
+    for incercare in range(SERP_CAPTCHA_MAX_RETRIES + 1):
+        with cronometru("google_wait"):
+            if not google_scheduler.acquire():
+                job.anulat = True
+                return None
+        rezultat = None
+        try:
+            with pool.slot() as slot:
+                rezultat = gaseste_cartela_google(query, job.tara, consola=consola, slot=slot, include_maps=False)
+        finally:
+            # proba din half-open se închide mereu, altfel acquire() așteaptă până la Stop
+            if rezultat is None or rezultat.get("error"):
+                google_scheduler.on_error()
+        if rezultat.get("error"):
+            return rezultat
+        if not rezultat.get("captcha"):
+            google_scheduler.on_success(consola=consola)
+            return rezultat
+        google_scheduler.on_captcha(consola=consola)
+        if incercare < SERP_CAPTCHA_MAX_RETRIES:
+            log(consola, f"   ↩️ [{job.idx}] Captcha: search re-queued ({incercare + 1}/{SERP_CAPTCHA_MAX_RETRIES}).")
+    job.eroare = "Captcha: Google kept blocking the search"
+    job.reincercabil = True   # nu spune nimic despre firmă: --resume o caută din nou
+    log(consola, f"   ❌ [{job.idx}] {job.eroare}")
+    return None
+
+def etapa_maps(job, pool, consola=None):
+    if not job.card:
+        return
+    # cartelele din cache de dinainte de MAPS_LAZY au trecut deja prin Maps
+    job.card.setdefault("maps_checked", job.din_cache)
+    actualizat = False
+    if nivel_activ("maps") and are_nevoie_de_maps(job.card):
+        with pool.slot() as slot:
+            completeaza_din_maps(job.card, consola=consola, slot=slot)
+        job.card["maps_checked"] = actualizat = True
+    elif nivel_activ("maps") and not job.din_cache and job.card.get("maps_href"):
+        log(consola, f"   ⏭️ [{job.idx}] Name and status already on the card, Maps not needed")
+    if not job.din_cache or actualizat:
+        # cartela (completată de Maps, dacă a fost nevoie) intră în cache
+        cache = get_serp_cache()
+        if cache:
+            cache.put(job.card_query, job.tara, job.card)
+    if job.card.get("closure_status") == "Permanently closed":
+        log(consola, f"   🛑 [{job.idx}] Company is permanently closed. Skipping detailed checks.")
+
+def etapa_website(job, pool, consola=None):
+    if nivel_activ("website") and job.detalii and job.card.get("site"):
+        job.site_nums = extrage_numere_de_pe_pagina(job.card["site"], job.tara, consola=consola, pool=pool,
+                                                    memo=url_memo_curent.get())
+
+def etapa_facebook(job, pool, consola=None):
+    if nivel_activ("facebook") and job.detalii and job.card.get("facebook"):
+        job.fb_nums = extrage_numere_de_pe_pagina(job.card["facebook"], job.tara, consola=consola, pool=pool,
+                                                  memo=url_memo_curent.get())
+
+ETAPE = [
+    ("serp", etapa_serp),
+    ("maps", etapa_maps),
+    ("website", etapa_website),
+    ("facebook", etapa_facebook),
+]
+ETAPE_NUME = [nume for nume, _ in ETAPE]
+
+def ruleaza_etapa(nume, etapa, job, pool, consola=None):
+    """O etapă pentru un rând, cu metricile rândului active în thread-ul curent."""
+    token = metrics_curente.set(job.metrics)
+    try:
+        with cronometru(nume):
+            etapa(job, pool, consola)
+    finally:
+        metrics_curente.reset(token)
+
+def rezultat_rand(job, consola=None):
+    """
+    Dict-ul de rezultat (o linie în Excel) pentru un rând terminat. O eroare la oricare etapă
+    apare în Unique Phones Found; rândurile reîncercabile primesc _retry (vezi CheckpointLog).
+    """
+    rezultat = _rezultat_rand(job, consola=consola)
+    if job.eroare:
+        rezultat["Unique Phones Found"] = f"Error: {job.eroare}"
+    if job.reincercabil:
+        rezultat["_retry"] = True
+    return rezultat
+
+def _rezultat_rand(job, consola=None):
+    tara = job.tara
+    rezultat_valid = job.card
+
+    if not rezultat_valid:
+        return {
+            "Company ID": job.id_link,
+            "Company Name": job.companie,
+            "Country": tara,
+            "Initial Phones": job.phone_col,
+            "DQP Employee Note": job.nota,
+            "Matched Company Name": "N/A",
+            "Google Address": "N/A",
+            "Unique Phones Found": f"Error: {job.eroare}" if job.eroare else "Google card not found",
+            "Google Phone(s)": "N/A",
+            "Facebook Phone(s)": "N/A",
+            "Website Phone(s)": "N/A",
+            "Closure Status": "N/A"
+        }
+
+    # Collect phones from all sources (Google card + site + Facebook), normalized for dedup
+    toate_numerele = set()
+
+    # Normalizează și dedup
+    google_norm = set(
+        n for n in (normalize_with_country_code(p, tara) for p in rezultat_valid.get("phones", []))
+        if n
+    )
+
+    # Afișare curată (o singură dată fiecare număr)
+    if google_norm:
+        telefoane_google = ', '.join(sorted(pretty_format(n, tara) for n in google_norm))
+    else:
+        telefoane_google = "N/A"
+
+    toate_numerele.update(google_norm)
+
+    closure_status = rezultat_valid.get("closure_status", "N/A")
+
+    if closure_status == "Permanently closed":
+        return {
+            "Company ID": job.id_link,
+            "Company Name": job.companie,
+            "Country": tara,
+            "Initial Phones": job.phone_col,
+            "Matched Company Name": rezultat_valid.get("company_name_found", "N/A"),
+            "Google Address": rezultat_valid.get("address", "N/A"),
+            "Unique Phones Found": "N/A",
+            "Google Phone(s)": ", ".join(set(rezultat_valid.get("phones", []))) or "N/A",
+            "Facebook Phone(s)": "N/A",
+            "Website Phone(s)": "N/A",
+            "Closure Status": closure_status,
+            "DQP Employee Note": job.nota  # dacă vrei să transferi și coloana asta
+        }
+
+
+    telefoane_site = "N/A" if nivel_activ("website") else NOT_CHECKED
+    if job.site_nums:
+        site_norm = set(
+            n for n in (normalize_with_country_code(x, tara) for x in job.site_nums)
+            if n
+        )
+        telefoane_site = ', '.join(sorted(pretty_format(n, tara) for n in site_norm))
+        toate_numerele.update(site_norm)
+
+
+    telefoane_fb = "N/A" if nivel_activ("facebook") else NOT_CHECKED
+    if job.fb_nums:
+        fb_norm = set(
+            n for n in (normalize_with_country_code(x, tara) for x in job.fb_nums)
+            if n
+        )
+        telefoane_fb = ', '.join(sorted(pretty_format(n, tara) for n in fb_norm))
+        toate_numerele.update(fb_norm)
+
+
+    # Numbers from employee note (normalize too)
+    numere_nota = job.numere_nota if job.numere_nota is not None else numere_din_nota(job.nota, tara)
+
+    # Additional = all found - already present - from note
+    numere_adaugate = toate_numerele - job.phones_initiale - numere_nota
+
+    if numere_adaugate:
+        text_aditional = ', '.join(sorted(pretty_format(n, tara) for n in numere_adaugate))
+    else:
+        text_aditional = "No additional phone found."
+
+
+    matched_name = (rezultat_valid.get("company_name_found") or "").strip() or "N/A"
+    if matched_name == "N/A" and not nivel_activ("maps"):
+        matched_name = NOT_CHECKED
+    log(consola,
+        f"   🏷️ [{job.idx}] Matched Name: {matched_name}\n"
+        f"   🏪 [{job.idx}] Closure Status: {closure_status}\n"
+        f"   ➤ [{job.idx}] Additional phones: {text_aditional}")
+
+    return {
+        "Company ID": job.id_link,
+        "Company Name": job.companie,
+        "Country": tara,
+        "Initial Phones": job.phone_col,
+        "DQP Employee Note": job.nota,
+        "Matched Company Name": matched_name,
+        "Google Address": rezultat_valid.get("address", "N/A"),
+        "Unique Phones Found": text_aditional,
+        "Google Phone(s)": telefoane_google,
+        "Facebook Phone(s)": telefoane_fb,
+        "Website Phone(s)": telefoane_site,
+        "Closure Status": closure_status
+    }
+
+async def ruleaza_pipeline(randuri, pool, on_result, consola=None, stop_flag=None, limits=None,
+                           metrics=None):
+    """
+    Rulează rândurile (idx, row) prin ETAPE, legate prin cozi limitate. Fiecare etapă are
+    propriii workeri (PIPELINE_LIMITS), deci site-ul/Facebook-ul rândului N se suprapun cu
+    căutarea Google a rândului N+1. on_result(idx, dict) e apelat în ordinea din fișier.
+    Cu metrics (RunMetrics), duratele și contoarele fiecărui rând sunt scrise la emitere.
+    Întoarce numărul de rânduri emise.
+    """
+    limits = {**PIPELINE_LIMITS, **(limits or {})}
+    memo = UrlMemo()
+    google_scheduler.stop_flag = stop_flag
+    readiness_stats.reset()
+    block_stats.reset()
+    url_memo_curent.set(memo)   # contextul task-ului curent, nu se scurge în alte rulări
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=sum(limits.values()) + 2,
+                                                 thread_name_prefix="etapa"))
+
+    def oprit():
+        return stop_flag is not None and stop_flag.is_set()
+
+    in_zbor = asyncio.Semaphore(PIPELINE_MAX_IN_FLIGHT)
+    cozi = [asyncio.Queue(PIPELINE_QUEUE_SIZE) for _ in range(len(ETAPE) + 1)]
+    emise = 0
+
+    async def alimentare():
+        seq = 0
+        for idx, row in randuri:
+            await in_zbor.acquire()
+            if oprit():
+                in_zbor.release()
+                break
+            await cozi[0].put(RowJob.din_rand(seq, idx, row))
+            seq += 1
+        for _ in range(limits[ETAPE[0][0]]):
+            await cozi[0].put(None)
+
+    async def worker(nume, etapa, q_in, q_out):
+        while True:
+            job = await q_in.get()
+            if job is None:
+                return
+            if etapa is etapa_serp and oprit():
+                job.anulat = True   # după Stop nu mai începem căutări noi
+            if job.eroare is None and not job.anulat:
+                try:
+                    await asyncio.to_thread(ruleaza_etapa, nume, etapa, job, pool, consola)
+                except Exception as e:
+                    job.eroare = f"{type(e).__name__}: {e}"
+                    job.reincercabil = True
+                    log(consola, f"   ❌ [{job.idx}] {job.eroare}")
+            await q_out.put(job)
+
+    async def etapa_completa(i):
+        nume, etapa = ETAPE[i]
+        await asyncio.gather(*(worker(nume, etapa, cozi[i], cozi[i + 1]) for _ in range(limits[nume])))
+        urmatorii = limits[ETAPE[i + 1][0]] if i + 1 < len(ETAPE) else 1
+        for _ in range(urmatorii):
+            await cozi[i + 1].put(None)
+
+    async def colector():
+        # rândurile pot termina în altă ordine; le ținem până vin cele dinainte
+        nonlocal emise
+        tampon = {}
+        urmator = 0
+        while True:
+            job = await cozi[-1].get()
+            if job is None:
+                return
+            tampon[job.seq] = job
+            while urmator in tampon:
+                job = tampon.pop(urmator)
+                urmator += 1
+                if not job.anulat:
+                    await asyncio.to_thread(on_result, job.idx, rezultat_rand(job, consola=consola))
+                    if metrics is not None:
+                        metrics.scrie(job.metrics)
+                    emise += 1
+                in_zbor.release()
+
+    await asyncio.gather(alimentare(), colector(), *(etapa_completa(i) for i in range(len(ETAPE))))
+    if memo.hits:
+        log(consola, f"♻️ Shared pages: {memo.hits} website/Facebook visits saved ({memo.misses} pages fetched).")
+    blocate, economisiti = block_stats.total()
+    if blocate:
+        log(consola, f"🚫 Blocked {blocate} images/fonts/media/tracker requests, "
+                     f"~{economisiti / 1_000_000:.1f} MB saved (estimated).")
+    for tip, st in sorted(readiness_stats.summary().items()):
+        log(consola, f"⏱️ Page waits [{tip}]: n={st['n']} p50={st['p50']}s p95={st['p95']}s "
+                     f"max={st['max']}s timeouts={st['timeouts']} (budget {READY_BUDGETS.get(tip)}s)")
+    return emise
+
+def _salveaza_cu_fallback(scrie, default_name, consola=None):
+    """
+    Save safely through scrie(path):
       1) try default name;
       2) if locked, save with timestamp;
-      3) if still failing, open Save As…
+      3) if still failing, open Save As… (GUI only).
     """
     def _log(msg):
-        if consola is not None:
-            consola.insert(tk.END, msg + "\n")
-            consola.see(tk.END)
-            consola.update()
+        log(consola, msg)
 
     try:
-        with pd.ExcelWriter(default_name, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False)
+        scrie(default_name)
         _log(f"💾 Saved: {os.path.abspath(default_name)}")
         return os.path.abspath(default_name)
     except PermissionError:
@@ -625,308 +3169,564 @@ def save_dataframe_safely(df: pd.DataFrame, default_name="rezultate_companii.xls
     name, ext = os.path.splitext(default_name)
     ts_name = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
     try:
-        with pd.ExcelWriter(ts_name, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False)
+        scrie(ts_name)
         _log(f"💾 Saved: {os.path.abspath(ts_name)}")
         return os.path.abspath(ts_name)
     except Exception as e:
         _log(f"⚠️ Could not save to timestamped name: {e}")
 
+    if not GUI_ACTIV or consola is None:
+        return None
+
+    from tkinter import filedialog
     _log("📁 Opening Save As… dialog.")
-    path = filedialog.asksaveasfilename(
+    is_csv = ext.lower() == ".csv"
+    # dialogul Tk se deschide doar pe thread-ul GUI-ului
+    path = consola.in_gui(lambda: filedialog.asksaveasfilename(
         title="Save results as...",
-        defaultextension=".xlsx",
+        defaultextension=ext or ".xlsx",
         initialfile=default_name,
-        filetypes=[("Excel files", "*.xlsx")],
-    )
+        filetypes=[("CSV files", "*.csv")] if is_csv else [("Excel files", "*.xlsx")],
+    ))
     if not path:
         _log("🛑 Save cancelled by user.")
         return None
 
     try:
-        with pd.ExcelWriter(path, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False)
+        scrie(path)
         _log(f"💾 Saved: {os.path.abspath(path)}")
         return os.path.abspath(path)
     except Exception as e:
         _log(f"❌ Final save failed: {e}")
         return None
 
+def save_rows_safely(rows_factory, default_name="rezultate_companii.xlsx", consola=None):
+    """
+    Salvează rândurile cu fallback-urile din _salveaza_cu_fallback, scrise în flux (xlsx
+    write-only sau CSV), fără DataFrame în memorie. rows_factory() dă un iterator nou la
+    fiecare încercare.
+    """
+    return _salveaza_cu_fallback(lambda path: scrie_rezultate_stream(path, rows_factory()),
+                                 default_name, consola=consola)
+
+"""=== Motorul unei rulări (folosit de GUI și de CLI) ==="""
+
+PROGRESS_EVERY = 25   # la câte rânduri terminate se raportează progresul
+
+class RunResult(NamedTuple):
+    saved_path: str     # None dacă fișierul nu a putut fi salvat
+    rows_done: int      # rânduri terminate în rularea asta (fără cele reluate din checkpoint)
+    stopped: bool       # oprit de utilizator înainte de final
+
+def ruleaza_fisier(filepath, output=None, consola=None, stop_flag=None, pool=None,
+                   pool_size=DRIVER_POOL_SIZE, resume=False, streaming=False,
+                   checkpoint_path=CHECKPOINT_PATH, metrics_path=METRICS_PATH,
+                   prom_path=METRICS_PROM_PATH, tier=None, shard=None,
+                   profiles_dir=CHROME_PROFILES_DIR, salveaza=True, results_path=RESULTS_PATH):
+    """
+    O rulare completă: citește fișierul, trece rândurile prin pipeline (cu checkpoint) și
+    salvează rezultatele în output (implicit rezultate_companii_<timestamp>.xlsx).
+    stop_flag e un threading.Event. Excepțiile ajung la apelant. Duratele pe rând și etapă
+    ajung în metrics_path / prom_path (vezi RunMetrics). tier alege adâncimea (ENRICHMENT_TIERS).
+    Cu shard=(i, n) se procesează doar rândurile shard-ului i din n (vezi ruleaza_shards);
+    cu salveaza=False rezultatul rămâne doar în checkpoint. Altfel rândurile terminate ajung pe loc
+    și în results_path (ResultWriter), din care se construiește la final output-ul.
+    """
+    global ENRICHMENT_TIER
+    import pandas as pd
+    if tier:
+        ENRICHMENT_TIER = tier
+    log(consola, f"🔎 Enrichment depth: {' + '.join(ENRICHMENT_TIERS[:ENRICHMENT_TIERS.index(ENRICHMENT_TIER) + 1])}")
+    pool_propriu = pool is None
+    if pool_propriu:
+        pool = DriverPool(pool_size, profiles_dir)
+        pool.incalzeste(consola=consola)   # browserele pornesc cât timp se citește fișierul
+    checkpoint = writer = None
+    metrics = RunMetrics(metrics_path, prom_path) if METRICS_ENABLED else None
+    try:
+        checkpoint = CheckpointLog(checkpoint_path, resume=resume)
+
+        deja = checkpoint.chei_terminate() if resume else set()
+        if deja:
+            log(consola, f"↩️ Resuming: {len(deja)} companies already in {checkpoint_path} are skipped.")
+
+        def de_procesat(idx, id_link):
+            return (shard is None or in_shard(idx, *shard)) and cheie_rand(idx, id_link) not in deja
+
+        if streaming:
+            # fișiere foarte mari: rând cu rând, doar coloanele necesare
+            sursa = citeste_randuri_xlsx(filepath)
+        else:
+            df = pd.read_excel(filepath)
+            df.index = pd.RangeIndex(1, len(df) + 1)   # idx = numărul rândului din fișier
+            ids = map(text_celula, df["Company ID (Link)"]) if "Company ID (Link)" in df else [""] * len(df)
+            df = df[[de_procesat(idx, id_link) for idx, id_link in zip(df.index, ids)]]
+            # telefoanele și notele, pentru tot tabelul, înainte de primul browser
+            preproceseaza_telefoane(df, consola=consola)
+            sursa = df.iterrows()
+        randuri = ((idx, row) for idx, row in sursa if de_procesat(idx, text_celula(row.get("Company ID (Link)"))))
+
+        if salveaza:
+            writer = ResultWriter(results_path, consola=consola)
+            for e in (checkpoint.iter_intrari() if deja else ()):
+                writer.append(e.get("_row", 0), {k: v for k, v in e.items() if not k.startswith("_")})
+
+        terminate = 0
+        def on_result(idx, rezultat):
+            nonlocal terminate
+            checkpoint.append(idx, rezultat)
+            if writer is not None:
+                writer.append(idx, rezultat)
+            terminate += 1
+            if terminate % PROGRESS_EVERY == 0:
+                log(consola, f"📈 {terminate} companies done", progress=terminate, row=idx)
+
+        asyncio.run(ruleaza_pipeline(randuri, pool, on_result, consola=consola, stop_flag=stop_flag,
+                                     metrics=metrics))
+        if metrics is not None:
+            metrics.log_summary(consola)
+
+        oprit = stop_flag is not None and stop_flag.is_set()
+        if oprit:
+            log(consola, '\n🛑 Process was stopped by the user.')
+
+        if not salveaza:
+            return RunResult(checkpoint_path, terminate, oprit)
+
+        # workbook-ul final se construiește o singură dată, în flux, din fișierul de rezultate
+        writer.close()
+        if writer.ordonat:
+            saved_path = render_xlsx(writer.path, output, consola=consola)
+        else:
+            if output is None:
+                output = f"rezultate_companii_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            saved_path = save_rows_safely(checkpoint.iter_rezultate, output, consola=consola)
+        return RunResult(saved_path, terminate, oprit)
+    finally:
+        if writer is not None:
+            writer.close()
+        if pool_propriu:
+            pool.close()
+        close_serp_cache()
+        if checkpoint is not None:
+            checkpoint.close()
+        if metrics is not None:
+            metrics.close()
+
+"""=== Rulare pe shard-uri (câte un proces pe shard) și unirea rezultatelor ==="""
+
+def in_shard(idx, i, n):
+    """Rândul idx (numerotat de la 1) aparține shard-ului i din n (rânduri alternate, încărcare egală)."""
+    return (idx - 1) % n == i
+
+def fisier_shard(path, i, n):
+    """rezultate.jsonl -> rezultate.shard1of4.jsonl (numerotare de la 1 în nume)."""
+    name, ext = os.path.splitext(path)
+    return f"{name}.shard{i + 1}of{n}{ext}"
+
+def uneste_shards(n, output, checkpoint_path=CHECKPOINT_PATH, consola=None):
+    """
+    Unește checkpoint-urile celor n shard-uri într-un singur fișier de rezultate, în ordinea
+    rândurilor din fișierul de intrare (heapq.merge după _row, în flux). Întoarce calea salvată.
+    """
+    loguri = []
+    for i in range(n):
+        path = fisier_shard(checkpoint_path, i, n)
+        if os.path.exists(path):
+            loguri.append(CheckpointLog(path, resume=True))
+        else:
+            log(consola, f"⚠️ Shard {i + 1}/{n}: {path} not found, its rows are missing from the results.")
+
+    def rezultate():
+        ultimul = None
+        for e in heapq.merge(*(c.iter_intrari() for c in loguri), key=lambda e: e.get("_row", 0)):
+            if e.get("_row") == ultimul:
+                continue   # același rând de două ori (shard rulat din nou fără --resume)
+            ultimul = e.get("_row")
+            yield {k: v for k, v in e.items() if not k.startswith("_")}
+
+    try:
+        return save_rows_safely(rezultate, output, consola=consola)
+    finally:
+        for c in loguri:
+            c.close()
+
+def ruleaza_shards(filepath, n, output=None, consola=None, argv_extra=(), checkpoint_path=CHECKPOINT_PATH,
+                   resume=False):
+    """
+    Pornește n procese (același script, --shard i/n), fiecare cu profilul Chrome și checkpoint-ul
+    lui, apoi unește rezultatele. Un shard căzut poate fi reluat singur cu --shard i/n --resume,
+    urmat de --shards n --merge-only. Întoarce (calea salvată, lista shard-urilor eșuate).
+    """
+    procese = []
+    for i in range(n):
+        cmd = [sys.executable, os.path.abspath(__file__), filepath, "--shard", f"{i + 1}/{n}",
+               "--checkpoint", checkpoint_path, *argv_extra]
+        if resume:
+            cmd.append("--resume")
+        procese.append(subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        text=True, encoding="utf-8", errors="replace"))
+        log(consola, f"🧩 Shard {i + 1}/{n} started (pid {procese[-1].pid}).")
+
+    def citeste_iesire(i, proc):
+        for linie in proc.stdout:
+            log(consola, f"[{i + 1}/{n}] {linie.rstrip()}")
+
+    cititori = [threading.Thread(target=citeste_iesire, args=(i, p), daemon=True) for i, p in enumerate(procese)]
+    for t in cititori:
+        t.start()
+    esuate = []
+    for i, proc in enumerate(procese):
+        cod = proc.wait()
+        if cod not in (EXIT_OK, EXIT_STOPPED):
+            esuate.append(i)
+            log(consola, f"❌ Shard {i + 1}/{n} failed (exit {cod}). Re-run it with: "
+                         f"--shard {i + 1}/{n} --resume, then --shards {n} --merge-only")
+    for t in cititori:
+        t.join()
+
+    if output is None:
+        output = f"rezultate_companii_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return uneste_shards(n, output, checkpoint_path=checkpoint_path, consola=consola), esuate
+
+"""=== Linie de comandă (batch, fără Tkinter) ==="""
+
+EXIT_OK = 0
+EXIT_ERROR = 1          # eroare neprevăzută (fișier lipsă, coloane lipsă, ...)
+EXIT_USAGE = 2          # argumente greșite (argparse)
+EXIT_SAVE_FAILED = 3    # procesarea s-a terminat, dar rezultatele nu au putut fi salvate
+EXIT_STOPPED = 130      # oprit cu Ctrl+C / SIGTERM; checkpoint-ul permite --resume
+
+class StdoutSink(LogSink):
+    """LogSink care afișează și pe stdout: text simplu sau câte un obiect JSON pe linie."""
+
+    def __init__(self, json_lines=False, **kwargs):
+        super().__init__(keep_events=False, **kwargs)
+        self.json_lines = json_lines
+        self._print_lock = threading.Lock()
+
+    def emit(self, msg, level=None, **fields):
+        level = _nivel(msg) if level is None else level
+        super().emit(msg, level=level, **fields)
+        if self.json_lines:
+            line = json.dumps({"ts": round(time.time(), 3), "level": logging.getLevelName(level),
+                               "thread": threading.current_thread().name, "msg": msg.strip(), **fields},
+                              ensure_ascii=False, default=str)
+        else:
+            line = msg
+        with self._print_lock:
+            print(line, flush=True)
+
+def _parser_cli():
+    parser = argparse.ArgumentParser(
+        prog="verificare_companii",
+        description="Check companies against their Google business card, website and Facebook page.")
+    parser.add_argument("input", help="input .xlsx file (columns: Company Name, Country, Phone(s), ...)")
+    parser.add_argument("-o", "--output", help="output .xlsx or .csv (default: rezultate_companii_<timestamp>.xlsx)")
+    parser.add_argument("-j", "--concurrency", type=int, default=DRIVER_POOL_SIZE,
+                        help=f"number of Chrome browsers (default: {DRIVER_POOL_SIZE})")
+    parser.add_argument("--cache", default=SERP_CACHE_PATH, help=f"SERP cache file (default: {SERP_CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the SERP cache")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help=f"checkpoint log (default: {CHECKPOINT_PATH})")
+    parser.add_argument("--resume", action="store_true", help="skip rows already in the checkpoint log")
+    parser.add_argument("--streaming", action="store_true", help="stream input/output (very large files)")
+    parser.add_argument("--results", default=RESULTS_PATH,
+                        help=f"results written as rows finish, .csv or .parquet (default: {RESULTS_PATH})")
+    parser.add_argument("--render-only", action="store_true",
+                        help="input is a results file (.csv, .parquet or checkpoint .jsonl): only build -o from it")
+    parser.add_argument("--no-headless", action="store_true", help="show the Chrome windows")
+    parser.add_argument("--json-log", action="store_true", help="print progress as JSON lines")
+    parser.add_argument("--log-file", default=LOG_FILE_PATH, help=f"rotating log file (default: {LOG_FILE_PATH})")
+    parser.add_argument("--metrics", default=METRICS_PATH,
+                        help=f"per-row stage timings, .jsonl or .csv (default: {METRICS_PATH})")
+    parser.add_argument("--prom", default=METRICS_PROM_PATH,
+                        help=f"Prometheus text-format snapshot (default: {METRICS_PROM_PATH})")
+    parser.add_argument("--no-metrics", action="store_true", help="do not record timing metrics")
+    parser.add_argument("--depth", choices=ENRICHMENT_TIERS, default=ENRICHMENT_TIER,
+                        help="card, card+maps, +website or +facebook (default: %(default)s)")
+    parser.add_argument("--always-maps", action="store_true",
+                        help="open Maps for every card, even when the panel has the name and status")
+    parser.add_argument("--shards", type=int, metavar="N",
+                        help="split the input into N shards, one process each, then merge the results")
+    parser.add_argument("--shard", type=_shard_arg, metavar="I/N",
+                        help="process only shard I of N (writes only that shard's checkpoint)")
+    parser.add_argument("--merge-only", action="store_true",
+                        help="with --shards N: only merge the existing shard checkpoints")
+    parser.add_argument("--block-stats", action="store_true",
+                        help="estimate the traffic saved by resource blocking (reads Chrome's performance log)")
+    return parser
+
+def _shard_arg(text):
+    try:
+        i, n = (int(x) for x in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected I/N, e.g. 2/4")
+    if not 1 <= i <= n:
+        raise argparse.ArgumentTypeError("I must be between 1 and N")
+    return i - 1, n
+
+def _argv_shard(args):
+    """Opțiunile transmise proceselor shard (checkpoint-ul și --shard se adaugă separat)."""
+    argv = ["-j", str(args.concurrency), "--cache", args.cache, "--depth", args.depth,
+            "--metrics", args.metrics, "--prom", args.prom, "--log-file", args.log_file]
+    for flag in ("no_cache", "streaming", "no_headless", "no_metrics", "always_maps", "block_stats"):
+        if getattr(args, flag):
+            argv.append("--" + flag.replace("_", "-"))
+    return argv
+
+def main(argv=None):
+    """Intrarea CLI. Întoarce codul de ieșire (vezi EXIT_*)."""
+    global CHROME_HEADLESS, SERP_CACHE_ENABLED, SERP_CACHE_PATH, METRICS_ENABLED, MAPS_LAZY, BLOCK_STATS_ENABLED
+    args = _parser_cli().parse_args(argv)
+
+    CHROME_HEADLESS = not args.no_headless
+    SERP_CACHE_ENABLED = not args.no_cache
+    SERP_CACHE_PATH = args.cache
+    METRICS_ENABLED = not args.no_metrics
+    MAPS_LAZY = not args.always_maps
+    BLOCK_STATS_ENABLED = args.block_stats
+
+    # fiecare proces shard are jurnalul lui: un RotatingFileHandler nu se împarte între procese
+    log_file = fisier_shard(args.log_file, *args.shard) if args.shard and args.log_file else args.log_file
+    consola = StdoutSink(json_lines=args.json_log, path=log_file)
+    stop_flag = threading.Event()
+
+    def opreste(signum, frame):
+        if stop_flag.is_set():
+            raise KeyboardInterrupt
+        stop_flag.set()
+        log(consola, "🛑 Stop requested. Finishing the companies in progress... (again to abort)")
+
+    vechi = {sig: signal.signal(sig, opreste) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        if not country_rules:
+            log(consola, "❌ all_country_phone_rules.json can not be loaded.")
+            return EXIT_ERROR
+        if not os.path.isfile(args.input):
+            log(consola, f"❌ Input file not found: {args.input}")
+            return EXIT_ERROR
+
+        if args.render_only:
+            saved_path = render_xlsx(args.input, args.output, consola=consola)
+            if not saved_path:
+                log(consola, "❌ The results could not be saved.")
+                return EXIT_SAVE_FAILED
+            log(consola, f"✅ Results saved to: {saved_path}", output=saved_path)
+            return EXIT_OK
+        if args.shards:
+            return _main_shards(args, consola)
+        if args.shard:
+            i, n = args.shard
+            # Google vede toate shard-urile de pe aceeași mașină: ritmul total rămâne cel configurat
+            google_scheduler.rate /= n
+            google_scheduler.rate_min /= n
+            google_scheduler.rate_max /= n
+            rezultat = ruleaza_fisier(args.input, consola=consola, stop_flag=stop_flag,
+                                      pool_size=max(1, args.concurrency), resume=args.resume,
+                                      streaming=args.streaming,
+                                      checkpoint_path=fisier_shard(args.checkpoint, i, n),
+                                      metrics_path=fisier_shard(args.metrics, i, n),
+                                      prom_path=fisier_shard(args.prom, i, n), tier=args.depth,
+                                      shard=(i, n), profiles_dir=os.path.join(CHROME_PROFILES_DIR, f"shard_{i + 1}"),
+                                      salveaza=False)
+            log(consola, f"✅ Shard {i + 1}/{n} done. {rezultat.rows_done} companies in {rezultat.saved_path}")
+            return EXIT_STOPPED if rezultat.stopped else EXIT_OK
+
+        rezultat = ruleaza_fisier(args.input, output=args.output, consola=consola, stop_flag=stop_flag,
+                                  pool_size=max(1, args.concurrency), resume=args.resume,
+                                  streaming=args.streaming, checkpoint_path=args.checkpoint,
+                                  metrics_path=args.metrics, prom_path=args.prom, tier=args.depth,
+                                  results_path=args.results)
+        if not rezultat.saved_path:
+            log(consola, "❌ Done, but the results could not be saved.")
+            return EXIT_SAVE_FAILED
+        log(consola, f"✅ Done. {rezultat.rows_done} companies processed. Results saved to: {rezultat.saved_path}",
+            rows=rezultat.rows_done, output=rezultat.saved_path)
+        return EXIT_STOPPED if rezultat.stopped else EXIT_OK
+    except KeyboardInterrupt:
+        log(consola, "🛑 Aborted. Run again with --resume to continue from the checkpoint.")
+        return EXIT_STOPPED
+    except Exception:
+        import traceback
+        log(consola, "❌ An error appered:\n" + traceback.format_exc())
+        return EXIT_ERROR
+    finally:
+        for sig, handler in vechi.items():
+            signal.signal(sig, handler)
+        consola.close()
+
+def _main_shards(args, consola):
+    n = args.shards
+    if n < 1:
+        log(consola, "❌ --shards must be at least 1.")
+        return EXIT_USAGE
+    output = args.output or f"rezultate_companii_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    if args.merge_only:
+        saved_path, esuate = uneste_shards(n, output, checkpoint_path=args.checkpoint, consola=consola), []
+    else:
+        saved_path, esuate = ruleaza_shards(args.input, n, output=output, consola=consola,
+                                            argv_extra=_argv_shard(args), checkpoint_path=args.checkpoint,
+                                            resume=args.resume)
+    if not saved_path:
+        log(consola, "❌ The merged results could not be saved.")
+        return EXIT_SAVE_FAILED
+    log(consola, f"✅ {n} shards merged into: {saved_path}", output=saved_path)
+    return EXIT_ERROR if esuate else EXIT_OK
+
 def interfata():
+    global GUI_ACTIV
+    import tkinter as tk
+    from tkinter import filedialog, scrolledtext, messagebox
+    GUI_ACTIV = True
+
     root = tk.Tk()
     root.title("Google Business Card Checker")
 
     frame = tk.Frame(root)
     frame.pack(pady=10)
     filepath_var = tk.StringVar()
-    stop_flag = tk.BooleanVar(value=False)
+    stop_flag = threading.Event()
+    pool_size_var = tk.IntVar(value=DRIVER_POOL_SIZE)
+    resume_var = tk.BooleanVar(value=False)
+    streaming_var = tk.BooleanVar(value=False)
+    tier_var = tk.StringVar(value=ENRICHMENT_TIER)
+    pool_activ = []   # pool-ul rulării curente, închis și la ieșirea din aplicație
+    pool_incalzit = []   # browsere pornite în fundal cât timp utilizatorul alege fișierul
 
     # if phone codes failed to load, show an error but allow UI to open
     if not country_rules :
         messagebox.showerror("Eroare",
             "all_country_phone_rules.json can not be loaded.\n"
             "Check the file and restart the application.")
-    # Console
+    # Console: workerii scriu în jurnal (LogSink), GUI-ul afișează în loturi
     global consola
-    consola = scrolledtext.ScrolledText(root, width=120, height=30)
-    consola.pack(padx=10, pady=10)
+    consola = LogSink()
+    consola_text = scrolledtext.ScrolledText(root, width=120, height=30)
+    consola_text.pack(padx=10, pady=10)
+
+    def goleste_jurnal():
+        events = consola.drain()
+        text, dialoguri = [], {}
+        for e in events:
+            cerere = e.fields.get("cerere")
+            if cerere is not None:
+                # LogSink.in_gui: fn() rulează aici, pe thread-ul Tk
+                fn, fut = cerere
+                try:
+                    fut.set_result(fn())
+                except Exception as ex:
+                    fut.set_exception(ex)
+                continue
+            text.append(e.msg + "\n")
+            if e.fields.get("dialog"):
+                # aceeași eroare de la mai multe browsere => un singur dialog
+                corp = e.fields.get("dialog_text") or e.msg.strip()
+                dialoguri.setdefault((e.fields["dialog"], e.fields.get("title", ""), corp), None)
+        if text:
+            consola_text.insert(tk.END, "".join(text))
+            consola_text.see(tk.END)
+        for tip, titlu, corp in dialoguri:
+            (messagebox.showinfo if tip == "info" else messagebox.showerror)(titlu, corp)
+        root.after(LOG_DRAIN_MS, goleste_jurnal)
 
     def incarca_fisier():
+        # Chrome pornește în fundal cât timp dialogul e deschis; Start folosește browserele gata pornite
+        if not pool_incalzit and not pool_activ:
+            try:
+                pool_size = max(1, int(pool_size_var.get()))
+            except (tk.TclError, ValueError):
+                pool_size = DRIVER_POOL_SIZE
+            pool = DriverPool(pool_size)
+            pool.incalzeste(consola=consola)
+            pool_incalzit.append(pool)
         filepath = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")])
         if filepath:
             filepath_var.set(filepath)
-            consola.insert(tk.END, f"Selected file: {filepath}\n")
-            consola.see(tk.END)
-            consola.update()
+            log(consola, f"Selected file: {filepath}")
 
-    def oprire():
-        stop_flag.set(True)
-        consola.insert(tk.END, "🛑 Stop requested. Finishing current company...\n")
-        consola.see(tk.END)
-        consola.update()
+    def exporta_excel():
+        # la cerere, și în timpul rulării: Excel-ul din rândurile terminate până acum
+        if not os.path.exists(RESULTS_PATH):
+            messagebox.showerror("Error", "There are no results yet.")
+            return
+        output = f"rezultate_companii_partial_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        threading.Thread(target=render_xlsx, args=(RESULTS_PATH, output, consola), daemon=True).start()
 
-    def proceseaza_fisier(filepath, consola, stop_flag):
+    def oprire():
+        stop_flag.set()
+        log(consola, "🛑 Stop requested. Finishing the companies in progress...")
+
+    def proceseaza_fisier(filepath, consola, stop_flag, pool_size=DRIVER_POOL_SIZE, resume=False,
+                          streaming=False, tier=None):
+        pool = pool_incalzit.pop() if pool_incalzit else None
+        if pool is not None and pool.size != pool_size:
+            pool.close()
+            pool = None
+        if pool is None:
+            pool = DriverPool(pool_size)
+            pool.incalzeste(consola=consola)
+        pool_activ.append(pool)
         try:
-            df = pd.read_excel(filepath)
-            rezultate = []
-
-            backup_interval = 5   # salvează la fiecare 5 companii
-
-            for idx, (_, row) in enumerate(df.iterrows(), start=1):
-                if stop_flag.get():
-                    consola.insert(tk.END, '\n🛑 Process was stopped by the user.\n')
-                    consola.see(tk.END)
-                    consola.update()
-                    break
-
-                companie = str(row["Company Name"])
-                id_link = str(row.get("Company ID (Link)", ""))
-                adresa = str(row.get("Address Line One", "") or "")
-                zip_code = str(row.get("ZIP", "") or "")
-                city = str(row.get("City", "") or "")
-                tara = str(row.get("Country", "") or "")
-                phone_col = str(row.get("Phone(s)", "") or "")
-                nota = str(row.get("DQP Employee Note", "") or "")
-
-                # Initial phones -> canonical E.164 (no '+'), strip any '(x/y)' suffixes
-                phones_initiale = set()
-                for p in re.split(r'[;,]', phone_col or ''):
-                    p = p.strip()
-                    if not p:
-                        continue
-                    p_curat = re.sub(r'\([^)]*\)', '', p).strip()
-                    if not p_curat:
-                        continue
-                    nrm = normalize_with_country_code(p_curat, tara)
-                    if nrm:
-                        phones_initiale.add(nrm)
-
-                consola.insert(tk.END, f"\n📦 [{idx}] {companie}:\n")
-                consola.see(tk.END)
-                consola.update()
-
-                variante_cautare = [
-                    f"{companie} {adresa} {zip_code} {city} {tara}",
-                    f"{companie} {city} {tara}",
-                ]
-                rezultat_valid = None
-
-                for query in variante_cautare:
-                    consola.insert(tk.END, f"   🔍 Searching: {query}\n")
-                    consola.see(tk.END)
-                    consola.update()
-                    rezultat = gaseste_cartela_google(query, tara, consola=consola)
-                    if not rezultat.get("found"):
-                        continue
-
-                    google_norm = set(
-                        n for n in (normalize_with_country_code(p, tara) for p in rezultat.get("phones", []))
-                        if n
-                    )
-
-                    consola.insert(tk.END, "   ✅ Google card found\n")
-                    consola.see(tk.END); consola.update()
-                    rezultat_valid = rezultat
-                    break
-
-                if not rezultat_valid:
-                    consola.insert(tk.END, "   ❌ No matching Google business card found\n")
-                    consola.see(tk.END)
-                    consola.update()
-                    rezultate.append({
-                        "Company ID": id_link,
-                        "Company Name": companie,
-                        "Country": tara,
-                        "Initial Phones": phone_col,
-                        "DQP Employee Note": nota,
-                        "Matched Company Name": "N/A",
-                        "Google Address": "N/A",
-                        "Unique Phones Found": "Google card not found",
-                        "Google Phone(s)": "N/A",
-                        "Facebook Phone(s)": "N/A",
-                        "Website Phone(s)": "N/A",
-                        "Closure Status": "N/A"
-                    })
-                    continue
-
-                # Collect phones from all sources (Google card + site + Facebook), normalized for dedup
-                toate_numerele = set()
-
-                # Normalizează și dedup
-                google_norm = set(
-                    n for n in (normalize_with_country_code(p, tara) for p in rezultat_valid.get("phones", []))
-                    if n
-                )
-
-                # Afișare curată (o singură dată fiecare număr)
-                if google_norm:
-                    telefoane_google = ', '.join(sorted(pretty_format(n, tara) for n in google_norm))
-                else:
-                    telefoane_google = "N/A"
-
-                toate_numerele.update(google_norm)
-
-
-                site = rezultat_valid.get("site")
-                facebook = rezultat_valid.get("facebook")
-                closure_status = rezultat_valid.get("closure_status", "N/A")
-
-                if closure_status == "Permanently closed":
-                    consola.insert(tk.END, "   🛑 Company is permanently closed. Skipping detailed checks.\n")
-                    consola.see(tk.END); consola.update()
-
-                    rezultate.append({
-                        "Company ID": id_link,
-                        "Company Name": companie,
-                        "Country": tara,
-                        "Initial Phones": phone_col,
-                        "Matched Company Name": rezultat_valid.get("company_name_found", "N/A"),
-                        "Google Address": rezultat_valid.get("address", "N/A"),
-                        "Unique Phones Found": "N/A",
-                        "Google Phone(s)": ", ".join(set(rezultat_valid.get("phones", []))) or "N/A",
-                        "Facebook Phone(s)": "N/A",
-                        "Website Phone(s)": "N/A",
-                        "Closure Status": closure_status,
-                        "DQP Employee Note": nota  # dacă vrei să transferi și coloana asta
-                    })
-                    continue
-
-
-                telefoane_site = "N/A"
-                if site:
-                    site_nums_raw = extrage_numere_de_pe_pagina(site, tara, consola=consola)
-                    if site_nums_raw:
-                        site_norm = set(
-                            n for n in (normalize_with_country_code(x, tara) for x in site_nums_raw)
-                            if n
-                        )
-                        telefoane_site = ', '.join(sorted(pretty_format(n, tara) for n in site_norm))
-                        toate_numerele.update(site_norm)
-
-
-                telefoane_fb = "N/A"
-                if facebook:
-                    fb_nums_raw = extrage_numere_de_pe_pagina(facebook, tara, consola=consola)
-                    if fb_nums_raw:
-                        fb_norm = set(
-                            n for n in (normalize_with_country_code(x, tara) for x in fb_nums_raw)
-                            if n
-                        )
-                        telefoane_fb = ', '.join(sorted(pretty_format(n, tara) for n in fb_norm))
-                        toate_numerele.update(fb_norm)
-
-
-                # Numbers from employee note (normalize too)
-                numere_nota = set(
-                    n for n in (normalize_with_country_code(x, tara) for x in extrage_numere(nota, country=tara))
-                    if n
-                )
-
-                # Additional = all found - already present - from note
-                numere_adaugate = toate_numerele - phones_initiale - numere_nota
-                
-                if numere_adaugate:
-                    text_aditional = ', '.join(sorted(pretty_format(n, tara) for n in numere_adaugate))
-                else:
-                    text_aditional = "No additional phone found."
-
-
-                matched_name = (rezultat_valid.get("company_name_found") or "").strip() or "N/A"
-                consola.insert(tk.END, f"   🏷️ Matched Name: {matched_name}\n")
-                consola.insert(tk.END, f"   🏪 Closure Status: {closure_status}\n")
-                consola.insert(tk.END, f"   ➤ Additional phones: {text_aditional}\n")
-                consola.see(tk.END)
-                consola.update()
-
-                rezultate.append({
-                    "Company ID": id_link,
-                    "Company Name": companie,
-                    "Country": tara,
-                    "Initial Phones": phone_col,
-                    "DQP Employee Note": nota,
-                    "Matched Company Name": matched_name,
-                    "Google Address": rezultat_valid.get("address", "N/A"),
-                    "Unique Phones Found": text_aditional,
-                    "Google Phone(s)": telefoane_google,
-                    "Facebook Phone(s)": telefoane_fb,
-                    "Website Phone(s)": telefoane_site,
-                    "Closure Status": closure_status
-                })
-
-                if idx % backup_interval == 0:
-                    # Suprascrie backup-ul la fiecare 5 companii
-                    rezultat_df = pd.DataFrame(rezultate)
-                    rezultat_df.to_excel("rezultate_companii_backup.xlsx", index=False)
-                    consola.insert(tk.END, f"💾 Backup has been overwrited after {idx} companies.\n")
-                    consola.see(tk.END)
-                    consola.update()
-
-            rezultat_df = pd.DataFrame(rezultate)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            saved_path = save_dataframe_safely(rezultat_df, f"rezultate_companii_{timestamp}.xlsx", consola=consola)
-
+            rezultat = ruleaza_fisier(filepath, consola=consola, stop_flag=stop_flag, pool=pool,
+                                      resume=resume, streaming=streaming, tier=tier)
+            saved_path = rezultat.saved_path
             if saved_path:
-                consola.insert(tk.END, f"\n✅ Done. Results saved to:\n{saved_path}\n")
-                consola.see(tk.END)
-                messagebox.showinfo("Complete!", f"Processing complete.\nSaved to:\n{saved_path}")
+                log(consola, f"\n✅ Done. Results saved to:\n{saved_path}", dialog="info", title="Complete!",
+                    dialog_text=f"Processing complete.\nSaved to:\n{saved_path}")
             else:
-                consola.insert(tk.END, "\n❌ Done, but could not save the Excel file.\n")
-                consola.see(tk.END)
-                messagebox.showerror("Save failed", "Processing finished, but the Excel file could not be saved.\nTry closing any open Excel files and run again.")
+                log(consola, "\n❌ Done, but could not save the Excel file.", dialog="error", title="Save failed",
+                    dialog_text="Processing finished, but the Excel file could not be saved.\n"
+                                "Try closing any open Excel files and run again.")
         except Exception as e:
             import traceback
-            consola.insert(tk.END, "❌ An error appered:\n" + traceback.format_exc() + "\n")
-            consola.see(tk.END)
-            consola.update()
-            messagebox.showerror("Error", str(e))
+            log(consola, "❌ An error appered:\n" + traceback.format_exc(), dialog="error", title="Error",
+                dialog_text=str(e))
         finally:
-            consola.insert(tk.END, "ℹ️ Worker thread finished.\n")
-            consola.see(tk.END)
-            consola.update()
+            pool.close()
+            pool_activ.remove(pool)
+            log(consola, "ℹ️ Worker thread finished.")
 
     def start_procesare():
         if not filepath_var.get():
             messagebox.showerror("Error", "Select an Excel file first.")
             return
-        stop_flag.set(False)
-        threading.Thread(target=proceseaza_fisier, args=(filepath_var.get(), consola, stop_flag), daemon=True).start()
+        try:
+            pool_size = max(1, int(pool_size_var.get()))
+        except (tk.TclError, ValueError):
+            pool_size = DRIVER_POOL_SIZE
+        stop_flag.clear()
+        threading.Thread(target=proceseaza_fisier,
+                         args=(filepath_var.get(), consola, stop_flag, pool_size, resume_var.get(),
+                               streaming_var.get(), tier_var.get()),
+                         daemon=True).start()
 
     def on_close():
-        try:
-            d = ensure_driver(consola=consola)
-            if d is not None:
-                d.quit()
-        except:
-            pass
+        for pool in list(pool_activ) + pool_incalzit:
+            pool.close()
+        # browserul implicit doar dacă a fost pornit (ensure_driver ar porni unul nou)
+        if _default_slot is not None:
+            _default_slot.quit()
+        consola.close()
         root.destroy()
 
     # UI buttons
     tk.Button(frame, text="Load Excel File", command=incarca_fisier).pack(side=tk.LEFT, padx=5)
     tk.Button(frame, text="Start", command=start_procesare).pack(side=tk.LEFT, padx=5)
     tk.Button(frame, text="Stop", command=oprire).pack(side=tk.LEFT, padx=5)
+    tk.Button(frame, text="Export Excel", command=exporta_excel).pack(side=tk.LEFT, padx=5)
+    tk.Label(frame, text="Browsers:").pack(side=tk.LEFT, padx=(15, 2))
+    tk.Spinbox(frame, from_=1, to=16, width=4, textvariable=pool_size_var).pack(side=tk.LEFT)
+    tk.Checkbutton(frame, text="Resume previous run", variable=resume_var).pack(side=tk.LEFT, padx=(15, 0))
+    tk.Checkbutton(frame, text="Streaming (large files)", variable=streaming_var).pack(side=tk.LEFT, padx=(5, 0))
+    tk.Label(frame, text="Depth:").pack(side=tk.LEFT, padx=(15, 2))
+    tk.OptionMenu(frame, tier_var, *ENRICHMENT_TIERS).pack(side=tk.LEFT)
 
     root.protocol("WM_DELETE_WINDOW", on_close)
+    root.after(LOG_DRAIN_MS, goleste_jurnal)
     root.mainloop()
 
 if __name__ == "__main__":
+    # fără argumente: interfața grafică; cu argumente: rulare batch din linia de comandă
+    if len(sys.argv) > 1:
+        sys.exit(main())
     interfata()
\ No newline at end of file